@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import build_qubo_arrays
+
+
+# Generate an in-memory catalog with uneven price ladders
+def generate_catalog(num_products, max_prices, elasticities_per_product, seed=42):
+    rng = random.Random(seed)
+    product_prices = {}
+    cross_product_prices = {}
+    min_margins = {}
+    num_prices = {}
+
+    for product in range(1, num_products + 1):
+        # Most products have a few prices, a handful use most of the ladder
+        num_prices[product] = min(max_prices, int(rng.paretovariate(1.2)))
+        margins = [rng.randint(100, 10000) for _ in range(num_prices[product])]
+        for price, margin in enumerate(margins, start=1):
+            product_prices[(product, price)] = float(margin)
+        min_margins[product] = float(min(margins))
+
+    for product_A in range(1, num_products + 1):
+        for _ in range(elasticities_per_product):
+            product_B = rng.randint(1, num_products)
+            price_A = rng.randint(1, num_prices[product_A])
+            cross_product_prices[(product_A, product_B, price_A)] = round(
+                rng.uniform(-20, 20), 2
+            )
+
+    return product_prices, cross_product_prices, min_margins
+
+
+# Rule 3 as it was written before the per-product price index: every
+# elasticity row scans the global set of price ids
+def legacy_rule3_scan(product_prices, cross_product_prices):
+    price_ids = set(key[1] for key in product_prices.keys())
+    num_terms = 0
+
+    for i1, i2, p in cross_product_prices:
+        if (i1, p) in product_prices:
+            for p2 in price_ids:
+                if (i2, p2) in product_prices:
+                    num_terms += 1
+
+    return num_terms
+
+
+def time_call(function, *args):
+    start_time = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the QUBO builder on catalogs of increasing size."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[500, 1000, 2000, 4000, 8000],
+        help="Number of products of each catalog",
+    )
+    parser.add_argument(
+        "--max_prices",
+        type=int,
+        default=400,
+        help="Length of the longest price ladder in the catalog",
+    )
+    parser.add_argument(
+        "--elasticities", type=int, default=5, help="Elasticity rows per product"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'products':>10} {'variables':>10} {'legacy rule 3 (s)':>18} {'builder (s)':>12}"
+    )
+
+    for num_products in args.sizes:
+        product_prices, cross_product_prices, min_margins = generate_catalog(
+            num_products, args.max_prices, args.elasticities
+        )
+
+        legacy_time = time_call(legacy_rule3_scan, product_prices, cross_product_prices)
+        builder_time = time_call(
+            build_qubo_arrays, product_prices, cross_product_prices, min_margins
+        )
+
+        print(
+            f"{num_products:>10} {len(product_prices):>10} "
+            f"{legacy_time:>18.3f} {builder_time:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts started by the frontend, and the classic solver
+SCRIPTS = [
+    "calculate_metrics.py",
+    "calculate_result_metrics.py",
+    "setup_project.py",
+    "clustering.py",
+    "get_cluster_data.py",
+    "elastic_pricing_clustering.py",
+    "get_results_data.py",
+    "get_margin_of_sales.py",
+    "elastic_pricing_classic.py",
+    "worker.py",
+]
+
+# Backends that no script should load before it is used
+HEAVY_MODULES = [
+    "dimod",
+    "networkx",
+    "dwave.system",
+    "dwave.samplers",
+    "sklearn",
+    "community",
+]
+
+# Run the top level of a script (its imports, main is not called) in a fresh
+# interpreter and print the time it took and the heavy modules it loaded
+IMPORT_CODE = """
+import sys, time, json, runpy
+sys.path.insert(0, sys.argv[1])
+start_time = time.perf_counter()
+runpy.run_path(sys.argv[2], run_name="benchmark")
+seconds = time.perf_counter() - start_time
+modules = [module for module in json.loads(sys.argv[3]) if module in sys.modules]
+print(json.dumps({"seconds": seconds, "modules": modules}))
+"""
+
+
+def time_import(script):
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            IMPORT_CODE,
+            ROOT_DIR,
+            os.path.join(ROOT_DIR, script),
+            json.dumps(HEAVY_MODULES),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the cold-start import time of the scripts."
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=5, help="Fresh interpreters per script"
+    )
+    parser.add_argument(
+        "--max_seconds",
+        type=float,
+        help="Fail if the import of a script takes longer than this",
+    )
+    args = parser.parse_args()
+
+    print(f"{'script':>30} {'import (s)':>11}  heavy modules")
+
+    failed = False
+    for script in SCRIPTS:
+        results = [time_import(script) for _ in range(args.repeats)]
+        seconds = min(result["seconds"] for result in results)
+        modules = results[0]["modules"]
+
+        print(f"{script:>30} {seconds:>11.3f}  {', '.join(modules) or '-'}")
+        if modules or (args.max_seconds is not None and seconds > args.max_seconds):
+            failed = True
+
+    if failed:
+        print("Some scripts load heavy modules or exceed the import time budget.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,43 @@
 import sys
 import json
-from collections import defaultdict
 import numpy as np
-from utils import read_price_data
+from utils import load_price_dataset
 
 
-def calculate_metrics(prices_file, cross_elasticity_file):
-    product_prices, cross_product_prices, min_margins = read_price_data(
-        prices_file, cross_elasticity_file
-    )
-
-    # Dictionary with the prices per product
-    prices_per_product = defaultdict(set)
-    elasticities = []
-
-    for (
-        product_A,
-        product_B,
-        price_A,
-    ), affected_margin_B in cross_product_prices.items():
-        elasticities.append(affected_margin_B)
-
-    for product, price in product_prices.keys():
-        prices_per_product[product].add(price)
+# Metrics of a price dataset
+def dataset_metrics(dataset):
+    # Number of prices per product
+    _, prices_per_product_lens = np.unique(dataset.products, return_counts=True)
+    elasticities = dataset.elasticities.astype(np.float64)
 
     # Calculate main metrics
-    num_productos = len(prices_per_product)
-    prices_per_product_lens = [len(precios) for precios in prices_per_product.values()]
-    max_prices = max(prices_per_product_lens, default=0)
-    min_prices = min(prices_per_product_lens, default=0)
-    media_prices = np.mean(prices_per_product_lens) if prices_per_product_lens else 0
-    media_margin_of_sales = (
-        np.mean(list(product_prices.values())) if product_prices else 0
-    )
+    num_productos = len(prices_per_product_lens)
+    max_prices = int(prices_per_product_lens.max()) if num_productos else 0
+    min_prices = int(prices_per_product_lens.min()) if num_productos else 0
+    media_prices = np.mean(prices_per_product_lens) if num_productos else 0
+    media_margin_of_sales = np.mean(dataset.margins) if dataset.num_prices else 0
 
     # Calculate elasticity metrics
     num_elasticidades = len(elasticities)
-    max_elasticidad = max(elasticities, default=0)
-    min_elasticidad = min(elasticities, default=0)
-    media_elasticidad = np.mean(elasticities) if elasticities else 0
+    max_elasticidad = (
+        dataset.decimal_value(elasticities.max()) if num_elasticidades else 0
+    )
+    min_elasticidad = (
+        dataset.decimal_value(elasticities.min()) if num_elasticidades else 0
+    )
+    media_elasticidad = np.mean(elasticities) if num_elasticidades else 0
 
     # Group elasticities by intervals of 5
     interval_size = 5
-    grouped_elasticities = defaultdict(int)
-
-    for elasticity in elasticities:
-        rounded_elasticity = round(elasticity / interval_size) * interval_size
-        grouped_elasticities[rounded_elasticity] += 1
+    rounded_elasticities, counts = np.unique(
+        np.round(elasticities / interval_size).astype(np.int64) * interval_size,
+        return_counts=True,
+    )
 
     # Create a summary of the elasticities
     elasticity_summary = [
-        {"elasticity": key, "count": grouped_elasticities[key]}
-        for key in sorted(grouped_elasticities.keys())
+        {"elasticity": key, "count": count}
+        for key, count in zip(rounded_elasticities.tolist(), counts.tolist())
     ]
 
     # Create the result dictionary
@@ -71,7 +57,11 @@ def calculate_metrics(prices_file, cross_elasticity_file):
         },
     }
 
-    print(json.dumps(result))
+    return result
+
+
+def calculate_metrics(prices_file, cross_elasticity_file):
+    return dataset_metrics(load_price_dataset(prices_file, cross_elasticity_file))
 
 
 if __name__ == "__main__":
@@ -84,7 +74,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     try:
-        calculate_metrics(sys.argv[1], sys.argv[2])
+        print(json.dumps(calculate_metrics(sys.argv[1], sys.argv[2])))
     except ValueError:
         print(
             json.dumps(
@@ -2,38 +2,49 @@ import pandas as pd
 import sys
 import json
 
-# Read the input files
-solutions_file = sys.argv[1]
-prices_file = sys.argv[2]
-elasticities_file = sys.argv[3]
-
-df_solutions = pd.read_csv(solutions_file, delimiter=";")
-df_prices = pd.read_csv(prices_file, delimiter=";")
-df_elasticities = pd.read_csv(elasticities_file, delimiter=";")
-
-# Merge the solutions and prices dataframes
-df_merged = df_solutions.merge(
-    df_prices, how="left", left_on=["product", "price"], right_on=["product", "price"]
-)
-
-# Initialize the adjusted margin column
-df_merged["adjusted_margin"] = df_merged["margin_of_sales"]
-
-# Update the adjusted margin based on the elasticities
-for _, row in df_elasticities.iterrows():
-    affected_product = row["affected_product_B"]
-    if affected_product in df_merged["product"].values:
-        df_merged.loc[
-            df_merged["product"] == affected_product, "adjusted_margin"
-        ] *= 1 + (row["affected_margin_B"] / 100)
-
-# Calculate the total expected margin
-total_expected_margin = df_merged["adjusted_margin"].sum()
-
-# Prepare the output
-results = df_merged[["product", "price", "cluster", "adjusted_margin"]].to_dict(
-    orient="records"
-)
-output = {"results": results, "total_expected_margin": total_expected_margin}
-
-print(json.dumps(output))
+
+# Margins of the solution prices adjusted by the elasticities: the margin of
+# a product is multiplied by (1 + e / 100) for every elasticity e that affects
+# it. The factors are multiplied per affected product and applied in one join.
+def result_metrics(df_solutions, df_prices, df_elasticities):
+    # Merge the solutions and prices dataframes
+    df_merged = df_solutions.merge(
+        df_prices,
+        how="left",
+        left_on=["product", "price"],
+        right_on=["product", "price"],
+    )
+
+    # Product of the factors of the elasticities of each affected product
+    factors = (
+        (1 + df_elasticities["affected_margin_B"] / 100)
+        .groupby(df_elasticities["affected_product_B"])
+        .prod()
+    )
+
+    # Update the adjusted margin based on the elasticities
+    df_merged["adjusted_margin"] = df_merged["margin_of_sales"] * df_merged[
+        "product"
+    ].map(factors).fillna(1)
+
+    # Calculate the total expected margin
+    total_expected_margin = df_merged["adjusted_margin"].sum()
+
+    # Prepare the output
+    results = df_merged[["product", "price", "cluster", "adjusted_margin"]].to_dict(
+        orient="records"
+    )
+
+    return {"results": results, "total_expected_margin": total_expected_margin}
+
+
+def calculate_result_metrics(solutions_file, prices_file, elasticities_file):
+    return result_metrics(
+        pd.read_csv(solutions_file, delimiter=";"),
+        pd.read_csv(prices_file, delimiter=";"),
+        pd.read_csv(elasticities_file, delimiter=";"),
+    )
+
+
+if __name__ == "__main__":
+    print(json.dumps(calculate_result_metrics(sys.argv[1], sys.argv[2], sys.argv[3])))
@@ -1,14 +1,8 @@
 import argparse
 import json
 import sys
-from utils import read_price_data
-from clustering import (
-    build_graph_from_cross_elasticities,
-    kernighan_lin_clustering,
-    louvain_spectral_clustering,
-    save_subgraph_data,
-    determine_graph_limits,
-)
+from clustering import run_clustering
+from clustering.pipeline import EIGEN_SOLVERS, check_eigen_solver
 
 
 def main():
@@ -38,57 +32,60 @@ def main():
     parser.add_argument(
         "--solver_type",
         default="exact",
-        choices=["exact", "hybrid", "quantum"],
+        choices=["exact", "gray", "hybrid", "quantum", "simulated", "tabu"],
         help="Solver type to use for clustering",
     )
+    parser.add_argument(
+        "--encoding",
+        default="one_hot",
+        choices=["one_hot", "domain_wall"],
+        help="Encoding of the price choices, which sets the QUBO size of every product",
+    )
+    parser.add_argument(
+        "--presolve",
+        action="store_true",
+        help="Remove the dominated prices before weighting the products",
+    )
+    parser.add_argument(
+        "--eigen_solver",
+        default="arpack",
+        choices=EIGEN_SOLVERS,
+        help="Eigensolver of the spectral refinement (amg requires pyamg)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes for the bisections or the Louvain sweep",
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="Random seed of the partition (42 by default)",
+    )
 
+    args = parser.parse_args()
     try:
-        # Read the input arguments
-        method = args.method
-        output_dir = args.output_dir
-        prices_file = args.prices_file
-        cross_elasticity_file = args.cross_elasticity_file
-        solver_type = args.solver_type
-
-        # Read price data from CSV files
-        product_prices, cross_product_prices, min_margins = read_price_data(
-            prices_file, cross_elasticity_file
-        )
+        check_eigen_solver(args.eigen_solver)
+    except ValueError as e:
+        parser.error(str(e))
 
-        # Build the graph from cross elasticities
-        graph = build_graph_from_cross_elasticities(cross_product_prices)
-
-        # Determine the maximum size of the subgraphs
-        num_products, max_prices_per_product, max_size = determine_graph_limits(
-            product_prices, solver_type
+    try:
+        # Partition the catalog and save the clusters
+        result = run_clustering(
+            args.method,
+            args.output_dir,
+            args.prices_file,
+            args.cross_elasticity_file,
+            solver_type=args.solver_type,
+            eigen_solver=args.eigen_solver,
+            encoding=args.encoding,
+            presolve=args.presolve,
+            workers=args.workers,
+            seed=args.seed,
         )
-
-        # Apply the selected clustering method
-        if method == "kernighan_lin":
-            # Apply the Kernighan-Lin algorithm to partition the graph
-            subgraphs = kernighan_lin_clustering(graph, max_size)
-        elif method == "louvain_spectral":
-            # Apply the Louvain-Spectral clustering algorithm to partition the graph
-            max_louvain_clusters = num_products // max_size
-            subgraphs = louvain_spectral_clustering(
-                graph, max_size, max_louvain_clusters
-            )
-        else:
-            raise ValueError(f"Unknown method: {method}")
-
-        # Save the subgraph data
-        for i, subgraph in enumerate(subgraphs):
-            save_subgraph_data(
-                subgraph,
-                product_prices,
-                cross_product_prices,
-                output_dir=f"{output_dir}/clusters",
-                prefix=f"{method}_cluster",
-                subgraph_index=i + 1,
-            )
-        print(json.dumps({"status": "success", "message": "Clustering completado"}))
+        print(json.dumps(result))
     except Exception as e:
         print(json.dumps({"status": "error", "message": str(e)}))
         sys.exit(1)
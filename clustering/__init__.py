@@ -1,8 +1,28 @@
-from .utils import determine_graph_limits
+import importlib
+
+from .graph import ProductGraph, build_product_graph, add_qubo_sizes
+
 from .utils import build_graph_from_cross_elasticities
 from .utils import split_graph_to_subgraphs
+from .utils import pack_subgraphs
 from .utils import save_subgraph_data
+from .utils import save_partition_data
 
 from .kernighan_lin import kernighan_lin_clustering
 
-from .louvain_spectral import louvain_spectral_clustering
+from .components import connected_components, partition_graph, component_clustering
+
+from .pipeline import run_clustering
+
+# Names imported on first access (PEP 562), so that networkx, python-louvain
+# and sklearn are only loaded by the Louvain and spectral clustering
+_LAZY_ATTRIBUTES = {
+    "louvain_spectral_clustering": ".louvain_spectral",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
@@ -0,0 +1,147 @@
+from multiprocessing import Pool
+
+import numpy as np
+from scipy.sparse import csgraph
+
+from .kernighan_lin import kernighan_lin_clustering
+from .utils import pack_subgraphs
+
+
+# Connected components of a graph as arrays of rows, and the rows of the
+# isolated products
+def connected_components(graph):
+    _, labels = csgraph.connected_components(graph.adjacency, directed=False)
+    order = np.argsort(labels, kind="stable")
+    components = np.split(order, np.cumsum(np.bincount(labels))[:-1])
+
+    isolated = [indices for indices in components if len(indices) == 1]
+    isolated = np.concatenate(isolated) if isolated else np.empty(0, dtype=np.int64)
+
+    return [indices for indices in components if len(indices) > 1], isolated
+
+
+# Partition a graph with one of the clustering methods
+def partition_graph(
+    graph,
+    method,
+    max_size,
+    max_connections=None,
+    workers=1,
+    seed=None,
+    eigen_solver="arpack",
+):
+    if method == "kernighan_lin":
+        return kernighan_lin_clustering(
+            graph, max_size, workers=workers, seed=seed, max_connections=max_connections
+        )
+    elif method == "louvain_spectral":
+        from .louvain_spectral import louvain_spectral_clustering
+
+        max_louvain_clusters = int(graph.node_weights.sum() // max_size)
+        return louvain_spectral_clustering(
+            graph,
+            max_size,
+            max_louvain_clusters,
+            eigen_solver=eigen_solver,
+            workers=workers,
+            seed=42 if seed is None else seed,
+            max_connections=max_connections,
+        )
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+
+# Split the rows of isolated products into consecutive groups that fit in the
+# budget. A product over the budget on its own gets a group of its own, as it
+# is solved without QUBO.
+def split_isolated(graph, isolated, max_size, max_connections=None):
+    variables = graph.node_weights[isolated]
+    connections = variables.astype(float)
+    if graph.couplers is not None:
+        connections = connections + graph.couplers.diagonal()[isolated]
+    if max_connections is None:
+        max_connections = np.inf
+
+    groups = []
+    start = 0
+    group_variables = group_connections = 0
+    for k in range(len(isolated)):
+        if k > start and (
+            group_variables + variables[k] > max_size
+            or group_connections + connections[k] > max_connections
+        ):
+            groups.append(isolated[start:k])
+            start = k
+            group_variables = group_connections = 0
+        group_variables += variables[k]
+        group_connections += connections[k]
+    if start < len(isolated):
+        groups.append(isolated[start:])
+
+    return groups
+
+
+def _partition_component_task(args):
+    return partition_graph(*args)
+
+
+# Partition every connected component of a graph on its own. Components that
+# fit in the budget are kept whole, the rest are partitioned in parallel with
+# workers > 1, and the isolated products, which need no QUBO, go last in
+# clusters of their own. A coupled product that does not fit in the budget on
+# its own cannot be solved, and raises a ValueError. The partitions are
+# seeded (with 42 by default), so the same catalog gives the same clusters.
+def component_clustering(
+    graph,
+    method,
+    max_size,
+    max_connections=None,
+    workers=1,
+    seed=None,
+    eigen_solver="arpack",
+):
+    components, isolated = connected_components(graph)
+    if components:
+        coupled = np.concatenate(components)
+        too_large = coupled[~graph.products_fit(max_size, max_connections)[coupled]]
+        if len(too_large):
+            raise ValueError(
+                f"Products {graph.products[np.sort(too_large)].tolist()} do not fit "
+                f"in a QUBO of {max_size} variables"
+            )
+    rng = np.random.default_rng(42 if seed is None else seed)
+
+    subgraphs = []
+    tasks = []
+    for indices in components:
+        if graph.fits(indices, max_size, max_connections):
+            subgraphs.append(graph.subgraph(indices))
+        else:
+            tasks.append(
+                (
+                    graph.subgraph(indices),
+                    method,
+                    max_size,
+                    max_connections,
+                    1,
+                    int(rng.integers(2**32)),
+                    eigen_solver,
+                )
+            )
+
+    # A single large component gets all the workers for itself
+    if workers > 1 and len(tasks) > 1:
+        with Pool(processes=min(workers, len(tasks))) as pool:
+            partitions = pool.map(_partition_component_task, tasks, chunksize=1)
+    else:
+        partitions = [partition_graph(*task[:4], workers, *task[5:]) for task in tasks]
+
+    for partition in partitions:
+        subgraphs.extend(partition)
+
+    # Merge the subgraphs that fit together in the budget
+    subgraphs = pack_subgraphs(graph, subgraphs, max_size, max_connections)
+    for indices in split_isolated(graph, np.sort(isolated), max_size, max_connections):
+        subgraphs.append(graph.subgraph(indices))
+
+    return subgraphs
@@ -0,0 +1,161 @@
+import numpy as np
+from scipy import sparse
+
+
+# Undirected product graph stored as a symmetric CSR adjacency matrix. Row i
+# of the matrix is the product products[i]. Nodes are weighted by their number
+# of QUBO variables, and couplers counts the QUBO couplers between every pair
+# of products (and within each product on the diagonal) when it is known.
+class ProductGraph:
+    def __init__(self, products, adjacency, node_weights=None, couplers=None):
+        self.products = products
+        self.adjacency = adjacency
+        if node_weights is None:
+            node_weights = np.ones(len(products))
+        self.node_weights = node_weights
+        self.couplers = couplers
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products.tolist())
+
+    def nodes(self):
+        return self.products.tolist()
+
+    @property
+    def num_edges(self):
+        num_self_loops = np.count_nonzero(self.adjacency.diagonal())
+        return (self.adjacency.nnz + num_self_loops) // 2
+
+    # Subgraph induced by the given row indices
+    def subgraph(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        couplers = None
+        if self.couplers is not None:
+            couplers = self.couplers[indices][:, indices].tocsr()
+
+        return ProductGraph(
+            self.products[indices],
+            self.adjacency[indices][:, indices].tocsr(),
+            self.node_weights[indices],
+            couplers,
+        )
+
+    # Number of QUBO variables of the products at the given rows
+    def num_variables(self, indices):
+        return self.node_weights[indices].sum()
+
+    # Number of QUBO connections (variables and couplers) of the products at
+    # the given rows, as counted by validate_qubo_arrays_size
+    def num_connections(self, indices):
+        couplers = self.couplers[indices][:, indices]
+
+        return (
+            self.num_variables(indices)
+            + (couplers.sum() + couplers.diagonal().sum()) / 2
+        )
+
+    # Whether the products at the given rows fit in a QUBO of the given size
+    def fits(self, indices, max_variables, max_connections=None):
+        if len(indices) <= 1:
+            return True
+        if self.num_variables(indices) > max_variables:
+            return False
+
+        return (
+            max_connections is None
+            or self.couplers is None
+            or self.num_connections(indices) <= max_connections
+        )
+
+    # Whether each product fits in a QUBO of the given size on its own
+    def products_fit(self, max_variables, max_connections=None):
+        fit = self.node_weights <= max_variables
+        if max_connections is not None and self.couplers is not None:
+            fit &= self.node_weights + self.couplers.diagonal() <= max_connections
+
+        return fit
+
+    # NetworkX view of the graph, labelled with the product ids
+    def to_networkx(self):
+        import networkx as nx
+
+        graph = nx.from_scipy_sparse_array(self.adjacency)
+        return nx.relabel_nodes(graph, dict(enumerate(self.products.tolist())))
+
+
+# Build the product graph from elasticity arrays, aggregating the absolute
+# affected margins of both directions of every pair of products as weight
+def build_product_graph(product_A, product_B, affected_margin_B, products=None):
+    product_A = np.asarray(product_A, dtype=np.int64)
+    product_B = np.asarray(product_B, dtype=np.int64)
+    weights = np.abs(np.asarray(affected_margin_B, dtype=float))
+
+    node_ids = [product_A, product_B]
+    if products is not None:
+        node_ids.append(np.asarray(products, dtype=np.int64))
+    node_ids = np.unique(np.concatenate(node_ids))
+
+    rows = np.searchsorted(node_ids, product_A)
+    cols = np.searchsorted(node_ids, product_B)
+    shape = (len(node_ids), len(node_ids))
+
+    # Duplicate entries are summed when converting to CSR
+    directed = sparse.coo_matrix((weights, (rows, cols)), shape=shape).tocsr()
+    adjacency = directed + directed.T - sparse.diags(directed.diagonal())
+
+    return ProductGraph(node_ids, adjacency.tocsr())
+
+
+# Weight the nodes of a graph with the size of the QUBO of their products:
+# one variable per price, couplers between all the prices of a product, and
+# couplers between each source price of an elasticity and all the prices of
+# the affected product
+def add_qubo_sizes(
+    graph, products, prices, product_A, product_B, price_A, encoding="one_hot"
+):
+    if encoding not in ("one_hot", "domain_wall"):
+        raise ValueError(f"Encoding {encoding} is not supported")
+
+    products = np.asarray(products, dtype=np.int64)
+    variable_codes = np.unique((products << 32) | np.asarray(prices, dtype=np.int64))
+    variable_products = variable_codes >> 32
+
+    num_variables = np.zeros(len(graph), dtype=np.int64)
+    in_graph = np.isin(variable_products, graph.products)
+    np.add.at(
+        num_variables, np.searchsorted(graph.products, variable_products[in_graph]), 1
+    )
+
+    product_A = np.asarray(product_A, dtype=np.int64)
+    product_B = np.asarray(product_B, dtype=np.int64)
+    source_codes = (product_A << 32) | np.asarray(price_A, dtype=np.int64)
+    is_variable = np.isin(source_codes, variable_codes)
+    valid = (
+        is_variable
+        & (product_A != product_B)
+        & np.isin(product_A, graph.products)
+        & np.isin(product_B, graph.products)
+    )
+    rows = np.searchsorted(graph.products, product_A[valid])
+    cols = np.searchsorted(graph.products, product_B[valid])
+
+    # A domain wall encoding drops a variable per product, and a price of the
+    # source product is the difference of at most two of its walls
+    row_couplers = num_variables[cols]
+    if encoding == "domain_wall":
+        num_variables = np.maximum(num_variables - 1, 0)
+        row_couplers = 2 * num_variables[cols]
+
+    shape = (len(graph), len(graph))
+    directed = sparse.coo_matrix((row_couplers, (rows, cols)), shape=shape).tocsr()
+    couplers = (
+        directed + directed.T + sparse.diags(num_variables * (num_variables - 1) / 2)
+    )
+
+    graph.node_weights = num_variables
+    graph.couplers = couplers.tocsr()
+
+    return graph
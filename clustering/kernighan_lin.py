@@ -1,24 +1,64 @@
-import networkx as nx
+from multiprocessing import Pool
 
+import numpy as np
 
-# Apply kernighan_lin_bisection to partition a graph into two subgraphs
-def kernighan_lin_clustering(graph, max_size):
+from .multilevel import multilevel_bisection
+
+
+def _bisection_task(args):
+    adjacency, node_weights, seed = args
+    return multilevel_bisection(adjacency, node_weights, seed=seed)
+
+
+# Recursive bisection, level by level. Subgraphs are kept as arrays of rows
+# of the adjacency matrix and the bisections of a level are independent.
+def _recursive_bisection(graph, max_size, max_connections, rng, map_function):
     subgraphs = []
-    queue = [graph]
+    level = [np.arange(len(graph))]
+
+    while level:
+        # Subgraphs larger than the maximum size are split in two
+        fits = [graph.fits(indices, max_size, max_connections) for indices in level]
+        tasks = [
+            (
+                graph.adjacency[indices][:, indices],
+                graph.node_weights[indices],
+                int(rng.integers(2**32)),
+            )
+            for indices, fit in zip(level, fits)
+            if not fit
+        ]
+        sides = iter(list(map_function(_bisection_task, tasks)))
+
+        next_level = []
+        for indices, fit in zip(level, fits):
+            if fit:
+                subgraphs.append(indices)
+            else:
+                side = next(sides)
+                next_level.extend([indices[~side], indices[side]])
+        level = next_level
 
-    while queue:
-        current_graph = queue.pop(0)
+    return [graph.subgraph(indices) for indices in subgraphs]
 
-        # If the current graph is smaller than the maximum size, we add it to the list of subgraphs
-        if len(current_graph) <= max_size:
-            subgraphs.append(current_graph)
-            continue
 
-        # Otherwise, we partition the graph into two subgraphs
-        partition = nx.algorithms.community.kernighan_lin_bisection(current_graph)
-        subgraph1 = current_graph.subgraph(partition[0]).copy()
-        subgraph2 = current_graph.subgraph(partition[1]).copy()
+# Partition a graph into subgraphs whose node weights add up to at most
+# max_size (and with at most max_connections QUBO connections) by recursive
+# multilevel Kernighan-Lin bisection, with the bisections of each level made
+# in parallel with workers > 1
+def kernighan_lin_clustering(
+    graph, max_size, workers=1, seed=None, max_connections=None
+):
+    rng = np.random.default_rng(seed)
 
-        queue.extend([subgraph1, subgraph2])
+    if workers > 1:
+        with Pool(processes=workers) as pool:
+            return _recursive_bisection(
+                graph,
+                max_size,
+                max_connections,
+                rng,
+                lambda task, tasks: pool.map(task, tasks, chunksize=1),
+            )
 
-    return subgraphs
+    return _recursive_bisection(graph, max_size, max_connections, rng, map)
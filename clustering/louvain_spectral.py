@@ -2,29 +2,65 @@ import networkx as nx
 import community as community_louvain
 from sklearn.cluster import SpectralClustering
 from collections import defaultdict
+from multiprocessing import Pool
 import numpy as np
 
+# Graph shared by the processes of the resolution sweep
+_sweep_graph = None
 
-# Find the optimal number of clusters using Elbow Method
-def optimal_louvain_clusters(graph, max_clusters):
-    modularities = []
-    partition_sizes = []
 
-    for resolution in np.linspace(0.1, 2.0, max_clusters):
-        partition = community_louvain.best_partition(graph, resolution=resolution)
-        modularity = community_louvain.modularity(partition, graph)
-        modularities.append(modularity)
-        partition_sizes.append(len(set(partition.values())))
+def _set_sweep_graph(graph):
+    global _sweep_graph
+    _sweep_graph = graph
+
+
+def _louvain_sweep_task(args):
+    resolution, seed = args
+    partition = community_louvain.best_partition(
+        _sweep_graph, resolution=resolution, random_state=seed
+    )
+
+    return partition, community_louvain.modularity(partition, _sweep_graph)
+
+
+# Find the optimal number of clusters using Elbow Method. At most
+# max_resolutions seeded Louvain runs are made, in parallel with workers > 1,
+# and the partition at the elbow is returned along with its size.
+def optimal_louvain_clusters(
+    graph, max_clusters, max_resolutions=20, workers=1, seed=42
+):
+    num_resolutions = max(2, min(max_clusters, max_resolutions))
+    tasks = [
+        (resolution, seed) for resolution in np.linspace(0.1, 2.0, num_resolutions)
+    ]
+
+    if workers > 1:
+        with Pool(
+            processes=min(workers, len(tasks)),
+            initializer=_set_sweep_graph,
+            initargs=(graph,),
+        ) as pool:
+            results = pool.map(_louvain_sweep_task, tasks, chunksize=1)
+    else:
+        _set_sweep_graph(graph)
+        results = [_louvain_sweep_task(task) for task in tasks]
+        _set_sweep_graph(None)
+
+    modularities = [modularity for partition, modularity in results]
+    partition_sizes = [len(set(partition.values())) for partition, _ in results]
 
     modularity_differences = np.diff(modularities)
     elbow_point = np.argmax(modularity_differences) + 1
 
-    return partition_sizes[elbow_point]
+    return partition_sizes[elbow_point], results[elbow_point][0]
 
 
-# Louvain clustering
-def louvain_clustering(graph, num_clusters):
-    partition = community_louvain.best_partition(graph, resolution=1.0)
+# Louvain clustering, starting from a precomputed partition if given
+def louvain_clustering(graph, num_clusters, partition=None, seed=42):
+    if partition is None:
+        partition = community_louvain.best_partition(
+            graph, resolution=1.0, random_state=seed
+        )
     communities = defaultdict(list)
 
     for node, community in partition.items():
@@ -39,60 +75,91 @@ def louvain_clustering(graph, num_clusters):
     return communities
 
 
-# Spectral clustering
-def spectral_clustering(graph, max_size):
-    subgraphs = [graph]  # Initial subgraph to process
+# Spectral clustering. The subgraphs are kept as arrays of rows of the
+# adjacency matrix, and the affinity is passed to the eigensolver as a sparse
+# matrix ("arpack", "lobpcg" or "amg", which needs pyamg).
+def spectral_clustering(
+    graph, max_size, indices=None, eigen_solver="arpack", max_connections=None
+):
+    if indices is None:
+        indices = np.arange(len(graph))
+    subgraphs = [np.asarray(indices)]  # Initial subgraph to process
     refined_subgraphs = []
 
     while subgraphs:
         subgraph = subgraphs.pop()
 
-        if len(subgraph.nodes) > max_size:
+        if not graph.fits(subgraph, max_size, max_connections):
             # Determine the number of clusters based on the subgraph size
-            num_clusters = max(2, len(subgraph.nodes) // max_size)
-
-            # Convert to adjacency matrix and apply Spectral clustering
-            adjacency_matrix = nx.to_numpy_array(subgraph)
-            clustering = SpectralClustering(
-                n_clusters=num_clusters, affinity="precomputed", random_state=42
-            )
-            labels = clustering.fit_predict(adjacency_matrix)
-
-            # Create new subgraphs based on the clusters
-            subgraph_clusters = defaultdict(list)
-            for node, label in zip(subgraph.nodes(), labels):
-                subgraph_clusters[label].append(node)
+            num_clusters = max(2, int(graph.num_variables(subgraph) // max_size))
+
+            # Slice the adjacency matrix and apply Spectral clustering
+            if num_clusters < len(subgraph):
+                adjacency_matrix = graph.adjacency[subgraph][:, subgraph]
+                clustering = SpectralClustering(
+                    n_clusters=num_clusters,
+                    affinity="precomputed",
+                    eigen_solver=eigen_solver,
+                    random_state=42,
+                )
+                labels = clustering.fit_predict(adjacency_matrix)
+            else:
+                labels = np.arange(len(subgraph))
+
+            # Split in halves if the clustering does not separate the nodes
+            if np.all(labels == labels[0]):
+                labels = np.arange(len(subgraph)) * 2 // len(subgraph)
 
             # Add new subgraphs to the list for processing
-            for nodes in subgraph_clusters.values():
-                subgraphs.append(subgraph.subgraph(nodes))
+            for label in np.unique(labels):
+                subgraphs.append(subgraph[labels == label])
         else:
             # If the subgraph respects the limit, add it to the final result
-            refined_subgraphs.append(subgraph)
+            refined_subgraphs.append(graph.subgraph(subgraph))
 
     return refined_subgraphs
 
 
 # Louvain-Spectral clustering
-def louvain_spectral_clustering(graph, max_size, max_louvain_clusters):
+def louvain_spectral_clustering(
+    graph,
+    max_size,
+    max_louvain_clusters,
+    eigen_solver="arpack",
+    workers=1,
+    seed=42,
+    max_connections=None,
+):
+    # python-louvain works on NetworkX graphs, so it gets a view with the
+    # nodes labelled by their row in the adjacency matrix
+    louvain_graph = nx.from_scipy_sparse_array(graph.adjacency)
+
     # Determining the optimal number of clusters for Louvain
-    optimal_clusters = optimal_louvain_clusters(
-        graph, max_clusters=max_louvain_clusters
+    optimal_clusters, partition = optimal_louvain_clusters(
+        louvain_graph, max_clusters=max_louvain_clusters, workers=workers, seed=seed
     )
 
-    # Apply Louvain clustering
-    louvain_communities = louvain_clustering(graph, optimal_clusters)
+    # Apply Louvain clustering, reusing the partition chosen by the sweep
+    louvain_communities = louvain_clustering(
+        louvain_graph, optimal_clusters, partition=partition
+    )
 
     # Refine communities with Spectral clustering
     final_subgraphs = []
-    for nodes in louvain_communities.values():
-        subgraph = graph.subgraph(nodes)
+    for indices in louvain_communities.values():
+        indices = np.sort(indices)
 
         # Refine with Spectral clustering if it exceeds maximum size
-        if len(subgraph.nodes) > max_size:
-            refined_subgraphs = spectral_clustering(subgraph, max_size)
+        if not graph.fits(indices, max_size, max_connections):
+            refined_subgraphs = spectral_clustering(
+                graph,
+                max_size,
+                indices,
+                eigen_solver=eigen_solver,
+                max_connections=max_connections,
+            )
             final_subgraphs.extend(refined_subgraphs)
         else:
-            final_subgraphs.append(subgraph)
+            final_subgraphs.append(graph.subgraph(indices))
 
     return final_subgraphs
@@ -0,0 +1,250 @@
+import heapq
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import breadth_first_order
+
+
+# Cut weight and gain of moving every node to the other side of a bisection
+def bisection_gains(adjacency, side):
+    adjacency = adjacency.tocoo()
+    off_diagonal = adjacency.row != adjacency.col
+    rows = adjacency.row[off_diagonal]
+    cols = adjacency.col[off_diagonal]
+    weights = adjacency.data[off_diagonal]
+
+    external = side[rows] != side[cols]
+    gains = np.zeros(adjacency.shape[0])
+    np.add.at(gains, rows, np.where(external, weights, -weights))
+
+    return weights[external].sum() / 2, gains
+
+
+# Weight of a bisection above the allowed imbalance
+def imbalance_excess(side, node_weights, tolerance):
+    difference = abs(node_weights[side].sum() - node_weights[~side].sum())
+
+    return max(0.0, difference - tolerance)
+
+
+# Improve a bisection with Fiduccia-Mattheyses passes. Nodes are moved from
+# the heavier side (or from either side when balanced) and every pass keeps
+# the most balanced state with the lowest cut it went through.
+def refine_bisection(
+    adjacency, side, node_weights=None, tolerance=None, max_passes=10, max_stall=100
+):
+    adjacency = adjacency.tocsr()
+    side = np.asarray(side, dtype=bool).copy()
+    if node_weights is None:
+        node_weights = np.ones(len(side))
+    if tolerance is None:
+        tolerance = node_weights.max()
+
+    # Python lists, which are faster than arrays for single-element access
+    indptr = adjacency.indptr.tolist()
+    indices = adjacency.indices.tolist()
+    data = adjacency.data.tolist()
+    weights = node_weights.tolist()
+
+    for _ in range(max_passes):
+        _, gains = bisection_gains(adjacency, side)
+        gains = gains.tolist()
+        current_side = side.tolist()
+        locked = [False] * len(side)
+        heaps = {False: [], True: []}
+        for node, gain in enumerate(gains):
+            heaps[current_side[node]].append((-gain, node))
+        for heap in heaps.values():
+            heapq.heapify(heap)
+
+        side_weights = {
+            False: node_weights[~side].sum(),
+            True: node_weights[side].sum(),
+        }
+        moves = []
+        total_gain = 0.0
+        best_excess = imbalance_excess(side, node_weights, tolerance)
+        best_gain = 0.0
+        best_moves = 0
+
+        while len(moves) - best_moves < max_stall:
+            # Best unlocked node of each side allowed to move
+            tops = {}
+            for from_side, heap in heaps.items():
+                while heap and (locked[heap[0][1]] or -heap[0][0] != gains[heap[0][1]]):
+                    heapq.heappop(heap)
+                if heap:
+                    tops[from_side] = heap[0]
+            if side_weights[True] != side_weights[False]:
+                heavier = side_weights[True] > side_weights[False]
+                tops = {heavier: tops[heavier]} if heavier in tops else {}
+            if not tops:
+                break
+
+            from_side = min(tops, key=tops.get)
+            _, node = heapq.heappop(heaps[from_side])
+            locked[node] = True
+            current_side[node] = not from_side
+            side_weights[from_side] -= weights[node]
+            side_weights[not from_side] += weights[node]
+            total_gain += gains[node]
+            moves.append(node)
+
+            for k in range(indptr[node], indptr[node + 1]):
+                neighbour = indices[k]
+                if neighbour == node or locked[neighbour]:
+                    continue
+                if current_side[neighbour] == from_side:
+                    gains[neighbour] += 2 * data[k]
+                else:
+                    gains[neighbour] -= 2 * data[k]
+                heapq.heappush(
+                    heaps[current_side[neighbour]], (-gains[neighbour], neighbour)
+                )
+
+            excess = max(0.0, abs(side_weights[True] - side_weights[False]) - tolerance)
+            if excess < best_excess - 1e-12 or (
+                excess <= best_excess + 1e-12 and total_gain > best_gain + 1e-12
+            ):
+                best_excess = excess
+                best_gain = total_gain
+                best_moves = len(moves)
+
+        # Keep the moves made up to the best state of the pass
+        best_nodes = moves[:best_moves]
+        side[best_nodes] = ~side[best_nodes]
+
+        if best_moves == 0:
+            break
+
+    return side
+
+
+# Match every node with its heaviest unmatched neighbour. Nodes propose their
+# heaviest neighbour and mutual proposals are matched, in a few rounds.
+def heavy_edge_matching(adjacency, node_weights, max_node_weight, rng, max_rounds=5):
+    adjacency = adjacency.tocoo()
+    candidates = (adjacency.row != adjacency.col) & (
+        node_weights[adjacency.row] + node_weights[adjacency.col] <= max_node_weight
+    )
+    rows = adjacency.row[candidates]
+    cols = adjacency.col[candidates]
+
+    # Random tie-breaking between edges of the same weight
+    weights = adjacency.data[candidates] * (1 + 1e-9 * rng.random(len(rows)))
+
+    match = np.full(adjacency.shape[0], -1)
+    for _ in range(max_rounds):
+        free = (match[rows] < 0) & (match[cols] < 0)
+        if not free.any():
+            break
+
+        order = np.lexsort((-weights[free], rows[free]))
+        free_rows = rows[free][order]
+        free_cols = cols[free][order]
+        is_first = np.ones(len(free_rows), dtype=bool)
+        is_first[1:] = free_rows[1:] != free_rows[:-1]
+
+        proposal = np.full(len(match), -1)
+        proposers = free_rows[is_first]
+        proposal[proposers] = free_cols[is_first]
+
+        mutual = proposers[proposal[proposal[proposers]] == proposers]
+        match[mutual] = proposal[mutual]
+
+    return match
+
+
+# Contract the matched nodes, returning the coarse graph, its node weights
+# and the coarse node of every node
+def coarsen(adjacency, node_weights, match):
+    num_nodes = len(match)
+    nodes = np.arange(num_nodes)
+    leaders = np.where(match >= 0, np.minimum(nodes, match), nodes)
+    _, coarse_nodes = np.unique(leaders, return_inverse=True)
+    num_coarse = coarse_nodes.max() + 1
+
+    projection = sparse.csr_matrix(
+        (np.ones(num_nodes), (nodes, coarse_nodes)), shape=(num_nodes, num_coarse)
+    )
+    coarse = (projection.T @ adjacency @ projection).tocsr()
+    coarse = (coarse - sparse.diags(coarse.diagonal())).tocsr()
+    coarse.eliminate_zeros()
+
+    coarse_weights = np.bincount(
+        coarse_nodes, weights=node_weights, minlength=num_coarse
+    )
+
+    return coarse, coarse_weights, coarse_nodes
+
+
+# Bisection grown in breadth-first order from a node until half the weight
+def grow_bisection(adjacency, node_weights, start, rng):
+    num_nodes = adjacency.shape[0]
+    reached = breadth_first_order(
+        adjacency, start, directed=False, return_predecessors=False
+    )
+    unreached = np.setdiff1d(np.arange(num_nodes), reached)
+    order = np.concatenate([reached, rng.permutation(unreached)])
+
+    cumulative_weights = np.cumsum(node_weights[order])
+    side = np.zeros(num_nodes, dtype=bool)
+    side[order[cumulative_weights > cumulative_weights[-1] / 2]] = True
+
+    return side
+
+
+# Multilevel bisection in the spirit of METIS: coarsen the graph by heavy-edge
+# matching, bisect the coarsest graph and refine the bisection at every level
+# on the way back
+def multilevel_bisection(
+    adjacency, node_weights=None, coarsest_size=100, num_initial=4, seed=None
+):
+    rng = np.random.default_rng(seed)
+    adjacency = adjacency.tocsr()
+    num_nodes = adjacency.shape[0]
+    if node_weights is None:
+        node_weights = np.ones(num_nodes)
+    node_weights = np.asarray(node_weights, dtype=float)
+    if num_nodes < 2:
+        return np.zeros(num_nodes, dtype=bool)
+
+    # Coarsening, while it still shrinks the graph
+    max_node_weight = max(node_weights.max(), 1.5 * node_weights.sum() / coarsest_size)
+    levels = []
+    while adjacency.shape[0] > coarsest_size:
+        match = heavy_edge_matching(adjacency, node_weights, max_node_weight, rng)
+        coarse, coarse_weights, coarse_nodes = coarsen(adjacency, node_weights, match)
+        if coarse.shape[0] > 0.95 * adjacency.shape[0]:
+            break
+
+        levels.append((adjacency, node_weights, coarse_nodes))
+        adjacency, node_weights = coarse, coarse_weights
+
+    # Best of a few refined bisections grown from random nodes
+    tolerance = node_weights.max()
+    best_side, best_score = None, None
+    num_coarse = adjacency.shape[0]
+    for start in rng.choice(num_coarse, min(num_initial, num_coarse), replace=False):
+        side = refine_bisection(
+            adjacency,
+            grow_bisection(adjacency, node_weights, start, rng),
+            node_weights,
+        )
+        score = (
+            imbalance_excess(side, node_weights, tolerance),
+            bisection_gains(adjacency, side)[0],
+        )
+        if best_score is None or score < best_score:
+            best_side, best_score = side, score
+
+    # Uncoarsening, refining the projected bisection at every level
+    side = best_side
+    for adjacency, node_weights, coarse_nodes in reversed(levels):
+        side = refine_bisection(adjacency, side[coarse_nodes], node_weights)
+
+    # Both sides must have nodes for a recursive bisection to progress
+    if side.all() or not side.any():
+        side = np.arange(num_nodes) >= num_nodes // 2
+
+    return side
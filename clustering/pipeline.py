@@ -0,0 +1,85 @@
+import importlib.util
+
+from utils import read_price_data, qubo_size_limits
+from utils.presolve import remove_dominated_prices
+
+from .components import component_clustering
+from .utils import build_graph_from_cross_elasticities
+from .utils import save_partition_data
+
+# Eigensolvers of the spectral refinement, amg needs the optional pyamg
+EIGEN_SOLVERS = ("arpack", "lobpcg", "amg")
+
+
+# Check that an eigensolver is supported and can be loaded
+def check_eigen_solver(eigen_solver):
+    if eigen_solver not in EIGEN_SOLVERS:
+        raise ValueError(f"Eigensolver {eigen_solver} is not supported")
+    if eigen_solver == "amg" and importlib.util.find_spec("pyamg") is None:
+        raise ValueError("The amg eigensolver requires pyamg (pip install pyamg)")
+
+
+# Partition the products of a catalog into clusters that fit in the QUBO
+# budget of the solver and save them to output_dir/clusters. The price data
+# can be given already read as (product_prices, cross_product_prices,
+# min_margins). The partition is seeded, with a fixed seed by default.
+def run_clustering(
+    method,
+    output_dir,
+    prices_file,
+    cross_elasticity_file,
+    solver_type="exact",
+    eigen_solver="arpack",
+    encoding="one_hot",
+    presolve=False,
+    workers=1,
+    price_data=None,
+    seed=None,
+):
+    check_eigen_solver(eigen_solver)
+
+    # Read price data from CSV files
+    if price_data is None:
+        price_data = read_price_data(prices_file, cross_elasticity_file)
+    product_prices, cross_product_prices, min_margins = price_data
+
+    # Remove the dominated prices, which are not part of any cluster
+    num_eliminated = 0
+    if presolve:
+        product_prices, cross_product_prices, num_eliminated = remove_dominated_prices(
+            product_prices, cross_product_prices, min_margins
+        )
+
+    # Build the graph from cross elasticities, weighting every product by
+    # the size of its QUBO
+    graph = build_graph_from_cross_elasticities(
+        cross_product_prices, product_prices, encoding=encoding
+    )
+
+    # Determine the QUBO budget of the subgraphs
+    max_variables, max_connections = qubo_size_limits(solver_type)
+
+    # Partition every connected component with the selected method
+    subgraphs = component_clustering(
+        graph,
+        method,
+        max_variables,
+        max_connections,
+        workers=workers,
+        seed=seed,
+        eigen_solver=eigen_solver,
+    )
+
+    # Save the subgraph data
+    save_partition_data(
+        subgraphs,
+        product_prices,
+        cross_product_prices,
+        output_dir=f"{output_dir}/clusters",
+    )
+
+    return {
+        "status": "success",
+        "message": "Clustering completado",
+        "num_eliminated_variables": num_eliminated,
+    }
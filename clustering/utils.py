@@ -1,97 +1,39 @@
 import os
 import csv
-import networkx as nx
+from contextlib import ExitStack
 
+import numpy as np
 
-def determine_graph_limits(product_prices, solver_type):
-    # Calculate the total number of distinct products
-    num_products = len(set(p[0] for p in product_prices))
+from .graph import add_qubo_sizes, build_product_graph
 
-    # Calculate the maximum number of prices per product
-    max_prices_per_product = max(
-        len([p for p in product_prices if p[0] == prod])
-        for prod in set(p[0] for p in product_prices)
+
+# Build the product graph from the cross elasticities data. The weight of an
+# edge is the sum of the absolute affected margins between both products.
+# With the prices, every product is a node, even without elasticities, and
+# nodes are weighted by the size of their QUBO.
+def build_graph_from_cross_elasticities(
+    cross_product_prices, product_prices=None, encoding="one_hot"
+):
+    keys = np.array(list(cross_product_prices), dtype=np.int64).reshape(-1, 3)
+    affected_margins = np.fromiter(
+        cross_product_prices.values(), dtype=float, count=len(keys)
     )
+    if product_prices is None:
+        return build_product_graph(keys[:, 0], keys[:, 1], affected_margins)
 
-    # Define the maximum allowable size of subgraphs based on the max prices per product
-    if solver_type == "quantum":
-        max_size = quantum_limits(max_prices_per_product)
-    elif solver_type == "hybrid":
-        max_size = quantum_limits(max_prices_per_product)
-    elif solver_type == "exact":
-        max_size = simulated_limits(max_prices_per_product)
-    else:
-        raise ValueError(f"Solver {solver_type} is not supported")
-
-    return num_products, max_prices_per_product, max_size
-
-
-def quantum_limits(max_prices_per_product):
-    if max_prices_per_product == 1:
-        max_size = 175
-    elif max_prices_per_product <= 2:
-        max_size = 85
-    elif max_prices_per_product <= 3:
-        max_size = 55
-    elif max_prices_per_product <= 4:
-        max_size = 40
-    elif max_prices_per_product <= 5:
-        max_size = 35
-    elif max_prices_per_product <= 7:
-        max_size = 25
-    elif max_prices_per_product <= 8:
-        max_size = 20
-    elif max_prices_per_product <= 11:
-        max_size = 15
-    elif max_prices_per_product <= 17:
-        max_size = 10
-    elif max_prices_per_product <= 35:
-        max_size = 5
-    else:
-        raise ValueError(f"Too many prices per product.")
-
-    return max_size
-
-
-def simulated_limits(max_prices_per_product):
-    if max_prices_per_product == 1:
-        max_size = 25
-    elif max_prices_per_product <= 2:
-        max_size = 12
-    elif max_prices_per_product <= 3:
-        max_size = 8
-    elif max_prices_per_product <= 4:
-        max_size = 6
-    elif max_prices_per_product <= 5:
-        max_size = 5
-    elif max_prices_per_product <= 6:
-        max_size = 4
-    elif max_prices_per_product <= 8:
-        max_size = 3
-    elif max_prices_per_product <= 12:
-        max_size = 2
-    elif max_prices_per_product <= 25:
-        max_size = 1
-    else:
-        raise ValueError(f"Too many prices per product.")
-
-    return max_size
-
-
-# Build a NetworkX graph from the cross elasticities data
-def build_graph_from_cross_elasticities(cross_product_prices):
-    graph = nx.Graph()
-
-    for (
-        product_A,
-        product_B,
-        price_A,
-    ), affected_margin_B in cross_product_prices.items():
-        # Use the absolute value of the affected margin as the weight of the edge
-        if graph.has_edge(product_A, product_B):
-            graph[product_A][product_B]["weight"] += abs(affected_margin_B)
-        else:
-            graph.add_edge(product_A, product_B, weight=abs(affected_margin_B))
+    variables = np.array(list(product_prices), dtype=np.int64).reshape(-1, 2)
+    graph = build_product_graph(
+        keys[:, 0], keys[:, 1], affected_margins, products=variables[:, 0]
+    )
+    add_qubo_sizes(
+        graph,
+        variables[:, 0],
+        variables[:, 1],
+        keys[:, 0],
+        keys[:, 1],
+        keys[:, 2],
+        encoding=encoding,
+    )
 
     return graph
 
@@ -99,17 +41,42 @@ def build_graph_from_cross_elasticities(cross_product_prices):
 # Split a graph into smaller subgraphs
 def split_graph_to_subgraphs(graph, num_subgraphs):
     subgraphs = []
-    nodes = list(graph.nodes())
-    chunk_size = len(nodes) // num_subgraphs
+    chunk_size = len(graph) // num_subgraphs
 
     for i in range(num_subgraphs):
-        chunk_nodes = nodes[i * chunk_size : (i + 1) * chunk_size]
-        subgraph = graph.subgraph(chunk_nodes).copy()
+        subgraph = graph.subgraph(np.arange(i * chunk_size, (i + 1) * chunk_size))
         subgraphs.append(subgraph)
 
     return subgraphs
 
 
+# Pack the subgraphs of a partition into as few clusters as the QUBO budget
+# allows, first-fit by decreasing number of variables
+def pack_subgraphs(graph, subgraphs, max_variables, max_connections=None):
+    parts = [
+        np.searchsorted(graph.products, subgraph.products) for subgraph in subgraphs
+    ]
+    parts.sort(key=graph.num_variables, reverse=True)
+
+    bins = []
+    bin_variables = []
+    for indices in parts:
+        variables = graph.num_variables(indices)
+        for k, packed in enumerate(bins):
+            if bin_variables[k] + variables > max_variables:
+                continue
+            merged = np.concatenate([packed, indices])
+            if graph.fits(merged, max_variables, max_connections):
+                bins[k] = merged
+                bin_variables[k] += variables
+                break
+        else:
+            bins.append(indices)
+            bin_variables.append(variables)
+
+    return [graph.subgraph(np.sort(indices)) for indices in bins]
+
+
 # Save the data of a subgraph to the corresponding files
 def save_subgraph_data(
     subgraph, product_prices, cross_product_prices, output_dir, prefix, subgraph_index
@@ -151,3 +118,76 @@ def save_subgraph_data(
             ["product_A", "affected_product_B", "price_A", "affected_margin_B"]
         )
         writer.writerows(filtered_cross_elasticities)
+
+
+# Open the CSV file of a cluster with its header, closed with the stack
+def open_cluster_writer(stack, path, header):
+    f = stack.enter_context(open(path, "w", newline=""))
+    writer = csv.writer(f, delimiter=";")
+    writer.writerow(header)
+
+    return writer
+
+
+# Save the data of all the subgraphs of a partition, streaming every row of
+# the prices and cross elasticities to the buffered writer of its subgraph
+# in a single pass. At most max_open_files cluster files are open at once, so
+# a partition with more clusters takes a pass per batch of clusters.
+def save_partition_data(
+    subgraphs, product_prices, cross_product_prices, output_dir, max_open_files=256
+):
+    # Create the output directory if it does not exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Assign every product to its subgraph once
+    product_cluster = {}
+    for cluster, subgraph in enumerate(subgraphs):
+        for product in subgraph:
+            product_cluster[product] = cluster
+
+    # Two files per cluster
+    batch_size = max(1, max_open_files // 2)
+    for first in range(0, len(subgraphs), batch_size):
+        last = min(first + batch_size, len(subgraphs))
+        clusters = range(first, last)
+
+        with ExitStack() as stack:
+            price_writers = [
+                open_cluster_writer(
+                    stack,
+                    os.path.join(output_dir, f"{cluster + 1}_elasticity_prices.csv"),
+                    ["product", "price", "margin_of_sales"],
+                )
+                for cluster in clusters
+            ]
+            cross_elasticity_writers = [
+                open_cluster_writer(
+                    stack,
+                    os.path.join(
+                        output_dir, f"{cluster + 1}_cross_elasticity_prices.csv"
+                    ),
+                    ["product_A", "affected_product_B", "price_A", "affected_margin_B"],
+                )
+                for cluster in clusters
+            ]
+
+            # Route every row to the writer of its subgraph
+            for (product, price), margin in product_prices.items():
+                cluster = product_cluster.get(product, -1)
+                if first <= cluster < last:
+                    price_writers[cluster - first].writerow(
+                        (product, price, int(margin))
+                    )
+
+            for (
+                product_A,
+                product_B,
+                price_A,
+            ), affected_margin_B in cross_product_prices.items():
+                cluster = product_cluster.get(product_A, -1)
+                if first <= cluster < last and cluster == product_cluster.get(
+                    product_B
+                ):
+                    cross_elasticity_writers[cluster - first].writerow(
+                        (product_A, product_B, price_A, affected_margin_B)
+                    )
@@ -1,9 +1,19 @@
+import argparse
+
 from utils import read_price_data, build_qubo_matrix, solve_qubo_model
 from utils import check_expected_products_list, check_price_selection_constraints
+from utils import check_domain_wall_constraints, decode_domain_wall_sample
+from utils import domain_wall_variables, domain_wall_to_one_hot
 from utils import validate_qubo_size
+from utils import best_polished_prices, sampleset_to_array
+from utils.build_qubo_matrix import variable_label, build_variable_index
+from utils.presolve import remove_dominated_prices
 
 
-def main():
+# Solve the whole catalog as a single QUBO. encoding is "one_hot" or
+# "domain_wall", and presolve removes the dominated prices and fixes
+# variables by roof duality.
+def main(encoding="one_hot", presolve=False):
     # Data files
     prices_file = "data/elasticity_prices.csv"
     cross_elasticity_file = "data/cross_elasticity_prices.csv"
@@ -13,9 +23,19 @@ def main():
         prices_file, cross_elasticity_file
     )
 
+    # Remove the dominated prices
+    if presolve:
+        print("Removing dominated prices...")
+        product_prices, cross_product_prices, num_removed = remove_dominated_prices(
+            product_prices, cross_product_prices, min_margins
+        )
+        print(f"Removed {num_removed} dominated prices.")
+
     # Build the QUBO matrix
     print("Building the QUBO matrix...")
-    Q = build_qubo_matrix(product_prices, cross_product_prices, min_margins)
+    Q = build_qubo_matrix(
+        product_prices, cross_product_prices, min_margins, encoding=encoding
+    )
 
     # Validate the QUBO matrix size
     print("Validating the QUBO matrix size...")
@@ -28,7 +48,9 @@ def main():
 
     # Solve the QUBO model
     print("Solving the QUBO model...")
-    result = solve_qubo_model(Q)
+    result = solve_qubo_model(Q, presolve=presolve)
+    if presolve:
+        print(f"Fixed {result.info['num_fixed_variables']} variables.")
 
     # Print the result
     print("Result: ")
@@ -38,6 +60,17 @@ def main():
     print("Validating the result...")
     sample = result.first.sample
 
+    # Check the walls and decode them as one price per product
+    if encoding == "domain_wall":
+        is_valid, invalid_products = check_domain_wall_constraints(sample)
+
+        if is_valid:
+            print("All products have valid domain walls.")
+        else:
+            print(f"Invalid products walls: {invalid_products}")
+
+        sample = decode_domain_wall_sample(sample, product_prices)
+
     # Check if the solution contains all the expected products
     is_valid, missing_products = check_expected_products_list(
         sample, [key[0] for key in product_prices.keys()]
@@ -56,6 +89,39 @@ def main():
     else:
         print(f"Invalid products prices: {invalid_products}")
 
+    # Repair and polish the best reads on the margin objective. The exact
+    # solver returns all the states, so only the best 10 are kept.
+    print("Post-processing the samples...")
+    result = result.truncate(10)
+    variable_index = build_variable_index(product_prices)
+    if encoding == "domain_wall":
+        labels = [variable_label(*var) for var in domain_wall_variables(variable_index)]
+        samples = domain_wall_to_one_hot(
+            sampleset_to_array(result, labels), variable_index
+        )
+    else:
+        labels = [variable_label(*var) for var in variable_index.variables]
+        samples = sampleset_to_array(result, labels)
+    prices, margin = best_polished_prices(samples, product_prices, cross_product_prices)
+    print(f"Polished prices: {prices}")
+    print(f"Polished margin: {margin}")
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Solve the elastic pricing problem as a single QUBO."
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=["one_hot", "domain_wall"],
+        default="one_hot",
+        help="Encoding of the price choices.",
+    )
+    parser.add_argument(
+        "--presolve",
+        action="store_true",
+        help="Remove dominated prices and fix variables by roof duality before solving.",
+    )
+    args = parser.parse_args()
+
+    main(encoding=args.encoding, presolve=args.presolve)
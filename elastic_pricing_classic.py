@@ -1,55 +1,301 @@
-from itertools import product
-from utils import read_price_data
+from collections import defaultdict
+import numpy as np
+from utils import read_price_data, MarginEvaluator, MarginScorer, local_search
 
 
+# Margin of a solution. A scorer built once for the price data can be given
+# to score many solutions, with its own lambda_force_price.
 def calculate_margin_with_restriction(
-    solution, product_prices, cross_product_prices, lambda_force_price=500
+    solution, product_prices, cross_product_prices, lambda_force_price=500, scorer=None
 ):
-    total_margin = 0
+    if scorer is None:
+        scorer = MarginScorer(product_prices, cross_product_prices, lambda_force_price)
 
-    # Add the margins for the selected products and prices
-    for product, price in solution.items():
-        margin = product_prices.get((product, price), 0)
-        total_margin += margin
+    return float(scorer.score_solutions([solution])[0])
 
-    # Penalize the solution if a product does not have a price
-    if None in solution.values():
-        total_margin -= lambda_force_price
 
-    # Apply the cross-elasticity constraints
-    for (prod_A, prod_B, price_A), impact in cross_product_prices.items():
-        if solution.get(prod_A) == price_A and prod_B in solution:
-            price_B = solution[prod_B]
-            affected_margin = product_prices.get((prod_B, price_B), 0)
+# Exhaustive search over all the combinations of prices, scored in batches
+def classical_solver_with_restriction(
+    product_prices,
+    cross_product_prices,
+    price_ids,
+    lambda_force_price=500,
+    batch_size=2**16,
+    scorer=None,
+):
+    if scorer is None:
+        scorer = MarginScorer(product_prices, cross_product_prices, lambda_force_price)
+    products = sorted({key[0] for key in product_prices.keys()})
+    num_products = len(products)
+    num_prices = len(price_ids)
+    best_solution = None
+    best_margin = float("-inf")
 
-            total_margin += affected_margin * impact / 100
+    # Choice of each price of price_ids for every product. The products that
+    # only have elasticities are not part of the solutions.
+    columns = np.array([scorer.columns[product] for product in products], dtype=int)
+    prices = np.array(
+        [[price] * len(scorer.products) for price in price_ids], dtype=object
+    ).reshape(num_prices, len(scorer.products))
+    price_choices = scorer.choices(prices)[:, columns]
 
-    return total_margin
+    # The combinations are numbered in base num_prices, the price of the first
+    # product being the most significant digit
+    powers = num_prices ** np.arange(num_products - 1, -1, -1, dtype=np.int64)
+    num_combinations = num_prices**num_products
 
+    for start in range(0, num_combinations, batch_size):
+        combinations = np.arange(start, min(start + batch_size, num_combinations))
+        digits = combinations[:, None] // powers % num_prices
 
-def classical_solver_with_restriction(
+        # Calculate the margins of the combinations of the batch
+        choices = np.full((len(combinations), len(scorer.products)), scorer.outside)
+        choices[:, columns] = price_choices[digits, np.arange(num_products)]
+        margins = scorer.score(choices)
+
+        # Update the best solution if the best margin of the batch is better
+        best = int(np.argmax(margins))
+        if margins[best] > best_margin:
+            best_margin = float(margins[best])
+            best_solution = {
+                product: price_ids[digit]
+                for product, digit in zip(products, digits[best].tolist())
+            }
+
+    return best_solution, best_margin
+
+
+# Candidate prices of each product. Prices without a margin for the product
+# and without elasticities from it behave the same, so only one of them is kept.
+def build_price_domains(products, product_prices, cross_product_prices, price_ids):
+    relevant_prices = defaultdict(set)
+
+    for product, price in product_prices:
+        relevant_prices[product].add(price)
+
+    for product_A, product_B, price_A in cross_product_prices:
+        relevant_prices[product_A].add(price_A)
+
+    domains = {}
+    for product in products:
+        domain = [price for price in price_ids if price in relevant_prices[product]]
+        filler = next(
+            (
+                price
+                for price in price_ids
+                if price is not None and price not in relevant_prices[product]
+            ),
+            None,
+        )
+        if filler is not None:
+            domain.append(filler)
+        if None in price_ids:
+            domain.append(None)
+        domains[product] = domain
+
+    return domains
+
+
+# Group the products into connected components of the elasticity graph
+def elasticity_components(products, cross_product_prices):
+    parent = {product: product for product in products}
+
+    def find(product):
+        while parent[product] != product:
+            parent[product] = parent[parent[product]]
+            product = parent[product]
+        return product
+
+    for product_A, product_B, price_A in cross_product_prices:
+        if product_A in parent and product_B in parent:
+            parent[find(product_A)] = find(product_B)
+
+    components = defaultdict(list)
+    for product in products:
+        components[find(product)].append(product)
+
+    return list(components.values())
+
+
+# Exact branch and bound search over the prices of a group of products
+def branch_and_bound_component(
+    products,
+    domains,
+    product_prices,
+    cross_product_prices,
+    lambda_force_price=500,
+    incumbent=None,
+):
+    # Explore the most connected products first to tighten the bounds early
+    degree = defaultdict(int)
+    for product_A, product_B, price_A in cross_product_prices:
+        degree[product_A] += 1
+        degree[product_B] += 1
+    order = sorted(products, key=lambda product: -degree[product])
+    position = {product: j for j, product in enumerate(order)}
+
+    domains = [domains[product] for product in order]
+    margins = [
+        np.array([product_prices.get((product, price), 0) for price in domain], float)
+        for product, domain in zip(order, domains)
+    ]
+    unary = [margin.copy() for margin in margins]
+
+    # Elasticity terms: (A, B, index of price_A in the domain of A, weight)
+    out_terms = [[] for _ in order]
+    in_terms = [[] for _ in order]
+    for (product_A, product_B, price_A), impact in cross_product_prices.items():
+        if product_A not in position or product_B not in position:
+            continue
+        a, b = position[product_A], position[product_B]
+        if price_A not in domains[a]:
+            continue
+        value_A = domains[a].index(price_A)
+        weight = impact / 100
+        if a == b:
+            unary[a][value_A] += margins[a][value_A] * weight
+            continue
+        best_term = max(0.0, float(np.max(margins[b] * weight)))
+        out_terms[a].append((b, value_A, weight))
+        in_terms[b].append((a, value_A, weight, best_term))
+
+    num_products = len(order)
+    assignment = [None] * num_products
+    gains = [np.zeros(len(domain)) for domain in domains]
+
+    # Best value of the elasticities whose affected product is still open,
+    # bounded for the price of the source product that triggers them
+    open_terms = [np.zeros(len(domain)) for domain in domains]
+    for terms in in_terms:
+        for a, value_A, weight, best_term in terms:
+            open_terms[a][value_A] += best_term
+
+    state = {
+        "value": 0.0,
+        "none_count": 0,
+        "best_value": float("-inf"),
+        "best_assignment": None,
+    }
+
+    # Start from a known solution, so that the search only has to beat it
+    if incumbent is not None:
+        solution, margin = incumbent
+        state["best_value"] = margin
+        state["best_assignment"] = [
+            domains[j].index(solution[product]) for j, product in enumerate(order)
+        ]
+
+    def assign(j, v, sign):
+        state["value"] += sign * unary[j][v]
+        if domains[j][v] is None:
+            state["none_count"] += sign
+        for b, value_A, weight in out_terms[j]:
+            if v != value_A:
+                continue
+            if assignment[b] is None:
+                gains[b] += sign * weight * margins[b]
+            else:
+                state["value"] += sign * weight * margins[b][assignment[b]]
+        for a, value_A, weight, best_term in in_terms[j]:
+            if assignment[a] is None:
+                open_terms[a][value_A] -= sign * best_term
+                gains[a][value_A] += sign * weight * margins[j][v]
+            elif assignment[a] == value_A:
+                state["value"] += sign * weight * margins[j][v]
+
+    def penalty():
+        return lambda_force_price if state["none_count"] > 0 else 0
+
+    def search(j):
+        if j == num_products:
+            value = state["value"] - penalty()
+            if value > state["best_value"]:
+                state["best_value"] = value
+                state["best_assignment"] = list(assignment)
+            return
+
+        # Admissible bound: every open product takes its best price on its own,
+        # counting the elasticities on open products only when they help
+        bound = state["value"] - penalty()
+        for k in range(j, num_products):
+            bound += float(np.max(unary[k] + gains[k] + open_terms[k]))
+        if bound <= state["best_value"] + 1e-9:
+            return
+
+        scores = unary[j] + gains[j]
+        for v in np.argsort(-scores, kind="stable").tolist():
+            assign(j, v, 1)
+            assignment[j] = v
+            search(j + 1)
+            assignment[j] = None
+            assign(j, v, -1)
+
+    search(0)
+
+    return {
+        product: domains[j][v]
+        for j, (product, v) in enumerate(zip(order, state["best_assignment"]))
+    }
+
+
+# Exact solver with the same objective as classical_solver_with_restriction,
+# solving each connected component of the elasticity graph by branch and bound
+def branch_and_bound_solver(
     product_prices, cross_product_prices, price_ids, lambda_force_price=500
 ):
-    products = {key[0] for key in product_prices.keys()}
-    best_solution = None
-    best_margin = float("-inf")
+    products = sorted({key[0] for key in product_prices.keys()})
+    domains = build_price_domains(
+        products, product_prices, cross_product_prices, price_ids
+    )
 
-    # Generate all possible combinations of prices
-    all_combinations = product(price_ids, repeat=len(products))
+    # The penalty for products without price couples all the products,
+    # otherwise each connected component is solved on its own
+    if None in price_ids:
+        components = [products]
+    else:
+        components = elasticity_components(products, cross_product_prices)
 
-    for combination in all_combinations:
-        # Create a solution dictionary with the current combination
-        solution = {product: price for product, price in zip(products, combination)}
+    component_of = {
+        product: c for c, component in enumerate(components) for product in component
+    }
+    component_elasticities = [{} for _ in components]
+    for key, impact in cross_product_prices.items():
+        if key[0] in component_of:
+            component_elasticities[component_of[key[0]]][key] = impact
 
-        # Calculate the margin for the current solution
-        margin = calculate_margin_with_restriction(
-            solution, product_prices, cross_product_prices, lambda_force_price
+    best_solution = {}
+    for component, elasticities in zip(components, component_elasticities):
+        # Local search from the best standalone prices gives the initial bound
+        evaluator = MarginEvaluator(
+            product_prices,
+            elasticities,
+            {
+                product: max(
+                    domains[product],
+                    key=lambda price: product_prices.get((product, price), 0),
+                )
+                for product in component
+            },
+            lambda_force_price,
+        )
+        incumbent = local_search(
+            evaluator, {product: domains[product] for product in component}
         )
 
-        # Update the best solution if the current margin is better
-        if margin > best_margin:
-            best_margin = margin
-            best_solution = solution
+        best_solution.update(
+            branch_and_bound_component(
+                component,
+                domains,
+                product_prices,
+                elasticities,
+                lambda_force_price,
+                incumbent=incumbent,
+            )
+        )
+
+    best_margin = calculate_margin_with_restriction(
+        best_solution, product_prices, cross_product_prices, lambda_force_price
+    )
 
     return best_solution, best_margin
 
@@ -65,7 +311,7 @@ if __name__ == "__main__":
 
     price_ids = list({key[1] for key in product_prices.keys()})
 
-    solution, margin = classical_solver_with_restriction(
+    solution, margin = branch_and_bound_solver(
         product_prices, cross_product_prices, price_ids
     )
 
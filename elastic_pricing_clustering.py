@@ -1,17 +1,282 @@
 import os
 import csv
 import json
+from multiprocessing import Pool
+import numpy as np
 from utils import (
     read_price_data,
-    build_qubo_matrix,
-    solve_qubo_model,
-    validate_qubo_size,
+    build_qubo_arrays,
+    solve_qubo_arrays,
+    validate_qubo_arrays_size,
+    qubo_size_limits,
+    best_polished_prices,
+    sampleset_to_array,
+    domain_wall_to_one_hot,
 )
+from utils.build_qubo_matrix import build_variable_index, qubo_lambdas
+from utils.presolve import remove_dominated_prices
+from utils.result_cache import ResultCache, content_key
+
+# Solvers whose results only depend on the QUBO, and solvers whose results are
+# reproducible with a seed. Other results are random and never cached.
+DETERMINISTIC_SOLVERS = ("exact", "gray")
+SEEDED_SOLVERS = ("simulated", "tabu")
+
+
+# List the cluster prefixes found in the folder, numeric prefixes in order
+def list_cluster_prefixes(folder_path):
+    prefixes = [
+        file.replace("_cross_elasticity_prices.csv", "")
+        for file in os.listdir(folder_path)
+        if file.endswith("_cross_elasticity_prices.csv")
+    ]
+
+    return sorted(prefixes, key=lambda prefix: (not prefix.isdigit(), prefix.zfill(20)))
+
+
+# Split off the products without elasticities on other products, whose best
+# price is the one with the highest margin (including the elasticity of the
+# product on itself), returned as (product, price, value) tuples
+def solve_independent_products(product_prices, cross_product_prices, min_margins):
+    coupled = set()
+    own_elasticities = {}
+    for (product_A, product_B, price_A), impact in cross_product_prices.items():
+        if product_A == product_B:
+            own_elasticities[(product_A, price_A)] = impact
+        else:
+            coupled.update((product_A, product_B))
+
+    best_prices = {}
+    for (product, price), margin in product_prices.items():
+        if product in coupled:
+            continue
+        value = margin * (1 + own_elasticities.get((product, price), 0) / 100)
+        if product not in best_prices or value > best_prices[product][1]:
+            best_prices[product] = (price, value)
+
+    sample = [
+        (product, price, int(best_prices[product][0] == price))
+        for product, price in product_prices
+        if product in best_prices
+    ]
+    coupled_problem = (
+        {key: value for key, value in product_prices.items() if key[0] in coupled},
+        {
+            key: value
+            for key, value in cross_product_prices.items()
+            if key[0] in coupled
+        },
+        {key: value for key, value in min_margins.items() if key in coupled},
+    )
+
+    return sample, coupled_problem
+
+
+# Read, build and solve the QUBO model of a single cluster. Returns the
+# solution, the number of variables eliminated by the presolve and the arrays
+# of the QUBO and of the solver samples (empty without QUBO, None when the
+# QUBO is over the size limits of the solver and only the independent products
+# are solved). The gray solver splits its search across workers processes.
+def solve_cluster_files(
+    prices_file,
+    cross_elasticity_file,
+    solver_type="quantum",
+    num_reads=10,
+    token=None,
+    num_sweeps=1000,
+    seed=None,
+    postprocess=False,
+    encoding="one_hot",
+    presolve=False,
+    workers=1,
+):
+    # Read price data
+    product_prices, cross_product_prices, min_margins = read_price_data(
+        prices_file, cross_elasticity_file
+    )
+
+    # Solve the independent products without a QUBO
+    independent_sample, (product_prices, cross_product_prices, min_margins) = (
+        solve_independent_products(product_prices, cross_product_prices, min_margins)
+    )
+    if not product_prices:
+        return independent_sample, 0, {}
+
+    # Remove the dominated prices before building the QUBO
+    num_eliminated = 0
+    if presolve:
+        product_prices, cross_product_prices, num_eliminated = remove_dominated_prices(
+            product_prices, cross_product_prices, min_margins
+        )
+
+    # Build QUBO matrix
+    qubo = build_qubo_arrays(
+        product_prices, cross_product_prices, min_margins, encoding=encoding
+    )
+
+    # Validate QUBO matrix size
+    max_variables, max_connections = qubo_size_limits(solver_type)
+    if not validate_qubo_arrays_size(qubo, max_variables, max_connections):
+        return independent_sample or None, num_eliminated, None
+
+    # Solve the QUBO model
+    result = solve_qubo_arrays(
+        qubo.linear,
+        qubo.rows,
+        qubo.cols,
+        qubo.values,
+        offset=qubo.offset,
+        token=token,
+        solver_type=solver_type,
+        num_reads=num_reads,
+        num_sweeps=num_sweeps,
+        seed=seed,
+        groups=(
+            [product for product, price in qubo.variables]
+            if encoding == "one_hot"
+            else None
+        ),
+        workers=workers,
+        presolve=presolve,
+    )
+    num_eliminated += result.info.get("num_fixed_variables", 0)
+
+    # The best num_reads reads are polished, otherwise the best one is kept.
+    # The exact solver returns all the states, not only num_reads.
+    result = result.truncate(num_reads if postprocess else 1)
+    samples = sampleset_to_array(result, range(len(qubo.variables)))
+
+    # QUBO and best reads of the solver
+    arrays = {
+        "variables": np.array(qubo.variables, dtype=np.int64).reshape(-1, 2),
+        "linear": qubo.linear,
+        "rows": qubo.rows,
+        "cols": qubo.cols,
+        "values": qubo.values,
+        "offset": qubo.offset,
+        "samples": samples,
+        "energies": result.record.energy,
+    }
+
+    # Decode the walls as one price per product
+    variables = qubo.variables
+    if encoding == "domain_wall":
+        variable_index = build_variable_index(product_prices)
+        samples = domain_wall_to_one_hot(samples, variable_index)
+        variables = variable_index.variables
+
+    # Repair and polish the reads, keeping the best one
+    if postprocess:
+        prices, _ = best_polished_prices(samples, product_prices, cross_product_prices)
+        return (
+            independent_sample
+            + [
+                (product, price, int(prices[product] == price))
+                for product, price in variables
+            ],
+            num_eliminated,
+            arrays,
+        )
+
+    # Extract the solution as (product, price, value) tuples
+    return (
+        independent_sample
+        + [(*var, int(value)) for var, value in zip(variables, samples[0])],
+        num_eliminated,
+        arrays,
+    )
+
+
+# Solve a single cluster, reusing the cached solution when cache_dir is given
+# and neither the cluster files nor the QUBO and solver parameters changed.
+# Runs of random solvers are only cached when they are seeded, and clusters over
+# the QUBO size limits of the solver never. Returns the solution, the number of
+# variables eliminated by the presolve and whether the QUBO was over the limits.
+def solve_cluster(
+    folder_path,
+    prefix,
+    solver_type="quantum",
+    num_reads=10,
+    token=None,
+    num_sweeps=1000,
+    seed=None,
+    postprocess=False,
+    encoding="one_hot",
+    presolve=False,
+    cache_dir=None,
+    max_cache_bytes=256 * 2**20,
+    workers=1,
+):
+    prices_file = os.path.join(folder_path, f"{prefix}_elasticity_prices.csv")
+    cross_elasticity_file = os.path.join(
+        folder_path, f"{prefix}_cross_elasticity_prices.csv"
+    )
+    options = {
+        "solver_type": solver_type,
+        "num_reads": num_reads,
+        "num_sweeps": num_sweeps,
+        "seed": seed,
+        "postprocess": postprocess,
+        "encoding": encoding,
+        "presolve": presolve,
+    }
+
+    reproducible = solver_type in DETERMINISTIC_SOLVERS or (
+        solver_type in SEEDED_SOLVERS and seed is not None
+    )
+    if cache_dir is None or not reproducible:
+        solution, num_eliminated, arrays = solve_cluster_files(
+            prices_file, cross_elasticity_file, token=token, workers=workers, **options
+        )
+        return solution, num_eliminated, arrays is None
+
+    # The token only gives access to the solver and the workers only split its
+    # search, they are not part of the key
+    cache = ResultCache(cache_dir, max_cache_bytes)
+    key = content_key(
+        [prices_file, cross_elasticity_file], {"lambdas": qubo_lambdas(), **options}
+    )
+    entry = cache.get(key)
+    if entry is not None:
+        solution = [tuple(row) for row in entry["solution"].tolist()]
+        return solution, int(entry["num_eliminated"]), False
+
+    solution, num_eliminated, arrays = solve_cluster_files(
+        prices_file, cross_elasticity_file, token=token, workers=workers, **options
+    )
+    if arrays is not None:
+        cache.put(
+            key,
+            solution=np.array(solution, dtype=np.int64).reshape(-1, 3),
+            num_eliminated=num_eliminated,
+            **arrays,
+        )
+
+    return solution, num_eliminated, arrays is None
+
+
+def _solve_cluster_task(args):
+    return solve_cluster(*args)
 
 
 def solve_and_integrate(
-    folder_path, output_file, solver_type="quantum", num_reads=10, token=None
+    folder_path,
+    output_file,
+    solver_type="quantum",
+    num_reads=10,
+    token=None,
+    workers=1,
+    num_sweeps=1000,
+    seed=None,
+    postprocess=False,
+    encoding="one_hot",
+    presolve=False,
+    cache_dir=None,
+    max_cache_bytes=256 * 2**20,
 ):
+    if solver_type == "gray" and encoding != "one_hot":
+        raise ValueError("The gray solver only supports the one_hot encoding")
+
     solutions = {}
 
     # Create the output file if it does not exist
@@ -19,46 +284,52 @@ def solve_and_integrate(
         with open(output_file, "w") as f:
             pass
 
-    # Iterate through the subgraphs in the folder
-    for file in os.listdir(folder_path):
-        if file.endswith("_cross_elasticity_prices.csv"):
-            prefix = file.replace("_cross_elasticity_prices.csv", "")
-            prices_file = os.path.join(folder_path, f"{prefix}_elasticity_prices.csv")
-            cross_elasticity_file = os.path.join(
-                folder_path, f"{prefix}_cross_elasticity_prices.csv"
-            )
-
-            # Read price data
-            product_prices, cross_product_prices, min_margins = read_price_data(
-                prices_file, cross_elasticity_file
-            )
-
-            # Build QUBO matrix
-            Q = build_qubo_matrix(product_prices, cross_product_prices, min_margins)
-
-            # Validate QUBO matrix size
-            max_variables = 175
-            max_connections = 30625
-            if not validate_qubo_size(Q, max_variables, max_connections):
-                continue
-
-            # Solve the QUBO model
-            result = solve_qubo_model(
-                Q, token=token, solver_type=solver_type, num_reads=num_reads
-            )
-
-            # Extract the solution
-            sample = result.first.sample
-            for var, value in sample.items():
-                parts = var.split("_")
-                product = int(parts[0][1:])
-                price = int(parts[1][1:])
-
-                if product not in solutions:
-                    solutions[product] = {"prices": [], "cluster": prefix}
-
-                if value == 1:
-                    solutions[product]["prices"].append(price)
+    # The clusters are independent, so they can be solved in any process. A
+    # single cluster gets the workers for its solver instead.
+    prefixes = list_cluster_prefixes(folder_path)
+    parallel = workers > 1 and len(prefixes) > 1
+    tasks = [
+        (
+            folder_path,
+            prefix,
+            solver_type,
+            num_reads,
+            token,
+            num_sweeps,
+            seed,
+            postprocess,
+            encoding,
+            presolve,
+            cache_dir,
+            max_cache_bytes,
+            1 if parallel else workers,
+        )
+        for prefix in prefixes
+    ]
+
+    if parallel:
+        with Pool(processes=min(workers, len(tasks))) as pool:
+            cluster_samples = pool.map(_solve_cluster_task, tasks, chunksize=1)
+    else:
+        cluster_samples = map(_solve_cluster_task, tasks)
+
+    # Merge the cluster solutions in prefix order, keeping the clusters whose
+    # QUBO was over the size limits of the solver
+    num_eliminated = 0
+    skipped_clusters = []
+    for prefix, (sample, cluster_eliminated, skipped) in zip(prefixes, cluster_samples):
+        num_eliminated += cluster_eliminated
+        if skipped:
+            skipped_clusters.append(prefix)
+        if sample is None:
+            continue
+
+        for product, price, value in sample:
+            if product not in solutions:
+                solutions[product] = {"prices": [], "cluster": prefix}
+
+            if value == 1:
+                solutions[product]["prices"].append(price)
 
     # Write the integrated solutions to the output file
     with open(output_file, "w", newline="") as f:
@@ -80,8 +351,11 @@ def solve_and_integrate(
         "status": "success",
         "message": f"Solutions saved to {output_file}",
         "num_products": len(solutions),
+        "num_eliminated_variables": num_eliminated,
+        "skipped_clusters": skipped_clusters,
     }
-    print(json.dumps(response))
+
+    return response
 
 
 def main():
@@ -98,23 +372,73 @@ def main():
     parser.add_argument(
         "--solver",
         default="quantum",
-        choices=["quantum", "exact", "hybrid"],
+        choices=["quantum", "exact", "gray", "hybrid", "simulated", "tabu"],
         help="Solver type.",
     )
     parser.add_argument(
         "--num_reads", type=int, default=10, help="Number of reads for the solver."
     )
+    parser.add_argument(
+        "--num_sweeps",
+        type=int,
+        default=1000,
+        help="Number of sweeps per read for the simulated annealing solver.",
+    )
+    parser.add_argument(
+        "--seed", type=int, help="Random seed for the simulated and tabu solvers."
+    )
+    parser.add_argument(
+        "--postprocess",
+        action="store_true",
+        help="Repair and polish the solver reads on the margin objective.",
+    )
+    parser.add_argument(
+        "--encoding",
+        default="one_hot",
+        choices=["one_hot", "domain_wall"],
+        help="Encoding of the price choices (domain_wall uses one less variable per product).",
+    )
+    parser.add_argument(
+        "--presolve",
+        action="store_true",
+        help="Remove dominated prices and fix variables by roof duality before solving.",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="Folder of the cache of cluster solutions, unchanged clusters are not solved again.",
+    )
+    parser.add_argument(
+        "--cache_size_mb",
+        type=float,
+        default=256,
+        help="Size of the cache above which the least recently used entries are removed.",
+    )
     parser.add_argument("--token", help="D-Wave API token for the quantum solver.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to solve the clusters in parallel, or by the gray solver of a single cluster.",
+    )
     args = parser.parse_args()
 
     # Solve and integrate solutions
-    solve_and_integrate(
+    response = solve_and_integrate(
         args.folder,
         args.output,
         solver_type=args.solver,
         num_reads=args.num_reads,
         token=args.token,
+        workers=args.workers,
+        num_sweeps=args.num_sweeps,
+        seed=args.seed,
+        postprocess=args.postprocess,
+        encoding=args.encoding,
+        presolve=args.presolve,
+        cache_dir=args.cache_dir,
+        max_cache_bytes=int(args.cache_size_mb * 2**20),
     )
+    print(json.dumps(response))
 
 
 if __name__ == "__main__":
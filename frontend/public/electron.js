@@ -184,43 +184,94 @@ async function createWindow() {
   ipcMain.handle(
     "get-margin-of-sales",
     async (event, resultsFilePath, pricesFilePath) => {
-      return new Promise((resolve, reject) => {
-        const python = spawn("python", [
-          path.join(__dirname, "../../get_margin_of_sales.py"),
+      try {
+        return await callWorker("get_margin_of_sales", [
           resultsFilePath,
           pricesFilePath,
         ]);
-
-        let result = "";
-        let errorMessage = "";
-
-        python.stdout.on("data", (data) => {
-          result += data.toString();
-        });
-
-        python.stderr.on("data", (data) => {
-          errorMessage += data.toString();
-        });
-
-        python.on("close", (code) => {
-          if (code === 0) {
-            try {
-              const parsedResult = JSON.parse(result);
-              resolve(parsedResult);
-            } catch (error) {
-              console.error("Error al parsear el resultado:", error);
-              resolve({ error: "Error al parsear el resultado." });
-            }
-          } else {
-            console.error("Error en el script Python:", errorMessage);
-            resolve({ error: errorMessage || "Error en el script Python." });
-          }
-        });
-      });
+      } catch (error) {
+        console.error("Error en el worker de Python:", error.message);
+        return { error: error.message || "Error en el script Python." };
+      }
     }
   );
 }
 
+// Single long-lived Python worker answering line-delimited JSON-RPC requests,
+// started on the first request and restarted if it exits
+let worker = null;
+let workerOutput = "";
+let nextRequestId = 1;
+const pendingRequests = new Map();
+
+function getWorker() {
+  if (worker) {
+    return worker;
+  }
+
+  worker = spawn("python", [path.join(__dirname, "../../worker.py")]);
+  workerOutput = "";
+
+  worker.stdout.on("data", (data) => {
+    workerOutput += data.toString();
+
+    let newline;
+    while ((newline = workerOutput.indexOf("\n")) >= 0) {
+      const line = workerOutput.slice(0, newline).trim();
+      workerOutput = workerOutput.slice(newline + 1);
+      if (!line) {
+        continue;
+      }
+
+      let response;
+      try {
+        response = JSON.parse(line);
+      } catch (error) {
+        console.error("Error al parsear la respuesta del worker:", line);
+        continue;
+      }
+
+      const request = pendingRequests.get(response.id);
+      if (!request) {
+        continue;
+      }
+      pendingRequests.delete(response.id);
+
+      if (response.error) {
+        request.reject(new Error(response.error.message));
+      } else {
+        request.resolve(response.result);
+      }
+    }
+  });
+
+  worker.stderr.on("data", (data) => {
+    console.error(data.toString());
+  });
+
+  worker.on("close", (code) => {
+    for (const request of pendingRequests.values()) {
+      request.reject(
+        new Error(`El worker de Python terminó (código ${code}).`)
+      );
+    }
+    pendingRequests.clear();
+    worker = null;
+  });
+
+  return worker;
+}
+
+function callWorker(method, params) {
+  return new Promise((resolve, reject) => {
+    const id = nextRequestId++;
+    pendingRequests.set(id, { resolve, reject });
+    getWorker().stdin.write(
+      JSON.stringify({ jsonrpc: "2.0", id, method, params }) + "\n"
+    );
+  });
+}
+
 function openFileDialog() {
   return new Promise((resolve, reject) => {
     dialog
@@ -247,132 +298,41 @@ function openFileDialog() {
 }
 
 function calculateMetricScript(pricesFile, elasticitiesFile) {
-  return new Promise(async (resolve, reject) => {
-    const python = await spawn("python", [
-      path.join(__dirname, "../../calculate_metrics.py"),
-      pricesFile,
-      elasticitiesFile,
-    ]);
-
-    let result = "";
-    let errorMessage = "";
-
-    python.stdout.on("data", (data) => {
-      result += data.toString();
-    });
-
-    python.stderr.on("data", (data) => {
-      errorMessage += data.toString();
-    });
-
-    python.on("close", (code) => {
-      if (code === 0) {
-        try {
-          const parsedResult = JSON.parse(result);
-          resolve(parsedResult);
-        } catch (error) {
-          reject(new Error("Error parsing the Python script result."));
-        }
-      } else {
-        reject(new Error(errorMessage || "Python script execution failed..."));
-      }
-    });
-  });
+  return callWorker("calculate_metrics", [pricesFile, elasticitiesFile]);
 }
 
-function setupProject(projectName, filePrices, fileElasticities) {
-  return new Promise(async (resolve, reject) => {
-    const python = await spawn("python", [
-      path.join(__dirname, "../../setup_project.py"),
-      projectName,
-      filePrices,
-      fileElasticities,
-    ]);
+async function setupProject(projectName, filePrices, fileElasticities) {
+  const result = await callWorker("setup_project", [
+    projectName,
+    filePrices,
+    fileElasticities,
+  ]);
 
-    let result = "";
-    let errorMessage = "";
-
-    python.stdout.on("data", (data) => {
-      result += data.toString();
-    });
-
-    python.stderr.on("data", (data) => {
-      errorMessage += data.toString();
-    });
+  if (result.status === "error") {
+    throw result.message;
+  }
 
-    python.on("close", (code) => {
-      if (code === 0) {
-        try {
-          const parsedResult = JSON.parse(result);
-          resolve(parsedResult);
-        } catch (error) {
-          reject(new Error("Error al parsear el resultado: ", error));
-        }
-      } else {
-        try {
-          const errorResult = JSON.parse(result.trim());
-          reject(errorResult.message);
-        } catch (parseError) {
-          console.error("Error al parsear el resultado:", parseError);
-        }
-        return;
-      }
-    });
-  });
+  return result;
 }
 
-function runClustering(
+async function runClustering(
   clusteringMethod,
   projectPath,
   filePricesPath,
   fileElasticitiesPath,
   solverType
 ) {
-  return new Promise(async (resolve, reject) => {
-    const python = await spawn("python", [
-      path.join(__dirname, "../../clustering.py"),
-      "--method",
-      clusteringMethod,
-      "--output_dir",
-      projectPath,
-      "--prices_file",
-      filePricesPath,
-      "--cross_elasticity_file",
-      fileElasticitiesPath,
-      "--solver_type",
-      solverType,
-    ]);
-
-    let result = "";
-    let errorMessage = "";
-
-    python.stdout.on("data", (data) => {
-      result += data.toString();
-    });
-
-    python.stderr.on("data", (data) => {
-      errorMessage += data.toString();
-    });
-
-    python.on("close", (code) => {
-      if (code === 0) {
-        try {
-          const parsedResult = JSON.parse(result);
-          resolve(parsedResult);
-        } catch (error) {
-          reject(new Error("Error al parsear el resultado: ", error));
-        }
-      } else {
-        try {
-          const errorResult = JSON.parse(result.trim());
-          reject(errorResult.message);
-        } catch (parseError) {
-          console.error("Error al parsear el resultado:", parseError);
-        }
-        return;
-      }
+  try {
+    return await callWorker("run_clustering", {
+      method: clusteringMethod,
+      output_dir: projectPath,
+      prices_file: filePricesPath,
+      cross_elasticity_file: fileElasticitiesPath,
+      solver_type: solverType,
     });
-  });
+  } catch (error) {
+    throw error.message;
+  }
 }
 
 function getClusterFilesPaths(clustersPath) {
@@ -390,138 +350,70 @@ function getClusterFilesPaths(clustersPath) {
 }
 
 function getClusterData(clustersPath, clusterNumber) {
-  return new Promise((resolve, reject) => {
-    const python = spawn("python", [
-      path.join(__dirname, "../../get_cluster_data.py"),
-      clustersPath,
-      clusterNumber.toString(),
-    ]);
-
-    let result = "";
-    let errorMessage = "";
-
-    python.stdout.on("data", (data) => {
-      result += data.toString();
-    });
-
-    python.stderr.on("data", (data) => {
-      errorMessage += data.toString();
-    });
-
-    python.on("close", (code) => {
-      if (code === 0) {
-        try {
-          resolve(JSON.parse(result));
-        } catch (error) {
-          console.error("Error al parsear JSON del script Python:", error);
-          reject(new Error("Error al parsear JSON del script Python."));
-        }
-      } else {
-        console.error("Error en el script Python:", errorMessage);
-        reject(new Error(errorMessage || "Error en el script Python"));
-      }
-    });
-  });
+  return callWorker("read_cluster_data", [clustersPath, clusterNumber]);
 }
 
-function runElasticPricing(
+async function runElasticPricing(
   folderPath,
   outputFile,
   solverType,
   numReads,
   token
 ) {
-  return new Promise((resolve, reject) => {
-    const scriptPath = path.join(
-      __dirname,
-      "../../elastic_pricing_clustering.py"
-    );
-
-    const process = spawn("python", [
-      scriptPath,
-      "--folder",
-      folderPath,
-      "--output",
-      outputFile,
-      "--solver",
-      solverType,
-      "--num_reads",
-      numReads.toString(),
-      "--token",
-      token,
-    ]);
-
-    let output = "";
-    let errorOutput = "";
-
-    process.stdout.on("data", (data) => {
-      output += data.toString();
+  try {
+    const result = await callWorker("solve_and_integrate", {
+      folder_path: folderPath,
+      output_file: outputFile,
+      solver_type: solverType,
+      num_reads: numReads,
+      token: token,
+      cache_dir: path.join(folderPath, "..", "cache"),
     });
 
-    process.stderr.on("data", (data) => {
-      errorOutput += data.toString();
-    });
-
-    process.on("close", (code) => {
-      if (code === 0) {
-        resolve({
-          status: "success",
-          message: "Asignación de precios completada",
-          output,
-        });
-      } else {
-        reject({
-          status: "error",
-          message: "Error executing elastic pricing",
-          error: errorOutput,
-        });
-      }
-    });
-  });
+    return {
+      status: "success",
+      message: "Asignación de precios completada",
+      output: JSON.stringify(result),
+    };
+  } catch (error) {
+    throw {
+      status: "error",
+      message: "Error executing elastic pricing",
+      error: error.message,
+    };
+  }
 }
 
-function getResultsData(resultsFilePath) {
-  return new Promise((resolve, reject) => {
-    if (!fs.existsSync(resultsFilePath)) {
-      return reject({ error: "El archivo de resultados no existe" });
-    }
-
-    const python = spawn("python", [
-      path.join(__dirname, "../../get_results_data.py"),
-      resultsFilePath,
-    ]);
-
-    let result = "";
-    let errorMessage = "";
+async function getResultsData(resultsFilePath) {
+  if (!fs.existsSync(resultsFilePath)) {
+    throw { error: "El archivo de resultados no existe" };
+  }
 
-    python.stdout.on("data", (data) => {
-      result += data.toString();
-    });
+  let result;
+  try {
+    result = await callWorker("read_results_data", [resultsFilePath]);
+  } catch (error) {
+    throw {
+      error: error.message || "Error en la ejecución del script Python.",
+    };
+  }
 
-    python.stderr.on("data", (data) => {
-      errorMessage += data.toString();
-    });
+  if (result.error) {
+    throw result;
+  }
 
-    python.on("close", (code) => {
-      if (code === 0) {
-        try {
-          const parsedResult = JSON.parse(result);
-          resolve(parsedResult);
-        } catch (error) {
-          reject({ error: "Error al parsear el JSON de los resultados." });
-        }
-      } else {
-        reject({
-          error: errorMessage || "Error en la ejecución del script Python.",
-        });
-      }
-    });
-  });
+  return result;
 }
 
 console.log("Aplicación Electron iniciando...");
 app.on("ready", createWindow);
 
+app.on("will-quit", () => {
+  if (worker) {
+    worker.kill();
+  }
+});
+
 app.on("window-all-closed", () => {
   if (process.platform !== "darwin") {
     app.quit();
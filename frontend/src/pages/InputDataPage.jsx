@@ -41,7 +41,8 @@ export default function InputDataPage({
       return;
     }
 
-    if (!projectData.apiKey && projectData.solver !== "exact") {
+    const localSolvers = ["exact", "gray", "simulated", "tabu"];
+    if (!projectData.apiKey && !localSolvers.includes(projectData.solver)) {
       console.error("Por favor, introduce una API KEY.");
       return;
     }
@@ -202,6 +203,9 @@ export default function InputDataPage({
             <option value="quantum">Solver cuántico</option>
             <option value="hybrid">Solver híbrido</option>
             <option value="exact">Simulador</option>
+            <option value="gray">Exacto (código Gray)</option>
+            <option value="simulated">Recocido simulado</option>
+            <option value="tabu">Búsqueda tabú</option>
           </select>
 
           <div className="file-upload">
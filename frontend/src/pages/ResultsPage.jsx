@@ -175,6 +175,9 @@ export default function ResultsPage({ projectData }) {
     quantum: "Cuántico",
     hybrid: "Híbrido",
     exact: "Simulador",
+    gray: "Exacto (código Gray)",
+    simulated: "Recocido simulado",
+    tabu: "Búsqueda tabú",
   };
 
   return (
@@ -13,8 +13,7 @@ def read_cluster_data(clusters_path, cluster_number):
     )
 
     if not os.path.exists(prices_file) or not os.path.exists(elasticities_file):
-        print(json.dumps({"error": "Archivos de cluster no encontrados"}))
-        sys.exit(1)
+        return {"error": "Archivos de cluster no encontrados"}
 
     # Read prices
     prices_data = []
@@ -77,7 +76,7 @@ def read_cluster_data(clusters_path, cluster_number):
         "elasticities": elasticities_data,
     }
 
-    print(json.dumps(output))
+    return output
 
 
 if __name__ == "__main__":
@@ -94,4 +93,7 @@ if __name__ == "__main__":
     clusters_path = sys.argv[1]
     cluster_number = int(sys.argv[2])
 
-    read_cluster_data(clusters_path, cluster_number)
+    output = read_cluster_data(clusters_path, cluster_number)
+    print(json.dumps(output))
+    if "error" in output:
+        sys.exit(1)
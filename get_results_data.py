@@ -7,8 +7,7 @@ import json
 def read_results_data(results_file):
     # Check if the results file exists
     if not os.path.exists(results_file):
-        print(json.dumps({"error": "El archivo de resultados no existe"}))
-        sys.exit(1)
+        return {"error": "El archivo de resultados no existe"}
 
     results_data = []
 
@@ -18,12 +17,7 @@ def read_results_data(results_file):
 
         headers = next(csv_reader, None)
         if headers is None or len(headers) < 3:
-            print(
-                json.dumps(
-                    {"error": "El archivo de resultados no tiene un formato válido"}
-                )
-            )
-            sys.exit(1)
+            return {"error": "El archivo de resultados no tiene un formato válido"}
 
         for row in csv_reader:
             if len(row) >= 3:
@@ -31,7 +25,7 @@ def read_results_data(results_file):
                     {"product": int(row[0]), "price": str(row[1]), "cluster": row[2]}
                 )
 
-    print(json.dumps(results_data))
+    return results_data
 
 
 if __name__ == "__main__":
@@ -42,4 +36,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     results_file = sys.argv[1]
-    read_results_data(results_file)
+    results_data = read_results_data(results_file)
+    print(json.dumps(results_data))
+    if isinstance(results_data, dict):
+        sys.exit(1)
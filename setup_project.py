@@ -18,12 +18,7 @@ def create_project_folder(project_name, prices_file, elasticities_file):
 
     # If the project folder already exists, return an error in JSON format
     if os.path.exists(project_path):
-        print(
-            json.dumps(
-                {"status": "error", "message": "El nombre del proyecto ya está en uso."}
-            )
-        )
-        sys.exit(1)
+        return {"status": "error", "message": "El nombre del proyecto ya está en uso."}
 
     # Create the project folder
     os.makedirs(project_path)
@@ -44,15 +39,9 @@ def create_project_folder(project_name, prices_file, elasticities_file):
             "elasticities_file": copied_elasticities_file,
         }
     except Exception as e:
-        print(
-            json.dumps(
-                {"status": "error", "message": f"Error al copiar archivos: {str(e)}"}
-            )
-        )
-        sys.exit(1)
+        return {"status": "error", "message": f"Error al copiar archivos: {str(e)}"}
 
-    # Print the output in JSON format
-    print(json.dumps(output))
+    return output
 
 
 if __name__ == "__main__":
@@ -71,4 +60,8 @@ if __name__ == "__main__":
     prices_file = sys.argv[2]
     elasticities_file = sys.argv[3]
 
-    create_project_folder(project_name, prices_file, elasticities_file)
+    # Print the output in JSON format
+    output = create_project_folder(project_name, prices_file, elasticities_file)
+    print(json.dumps(output))
+    if output["status"] == "error":
+        sys.exit(1)
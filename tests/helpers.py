@@ -0,0 +1,90 @@
+from itertools import product
+
+import numpy as np
+
+
+# Random price data of the products 0 .. num_products - 1, with the prices
+# 1 .. num_prices (a random number of them per product with variable_prices),
+# each kept with probability price_probability. The elasticities go between
+# the products, on themselves and from the extra_products products without
+# price rows, and only from a product to a higher one with one_way.
+def random_price_data(
+    rng,
+    num_products,
+    num_prices=3,
+    price_probability=1.0,
+    variable_prices=False,
+    elasticities_per_product=3,
+    max_impact=30,
+    extra_products=0,
+    one_way=False,
+):
+    product_prices = {}
+    for product_id in range(num_products):
+        count = rng.randint(1, num_prices) if variable_prices else num_prices
+        for price in range(1, count + 1):
+            if rng.random() < price_probability:
+                product_prices[(product_id, price)] = float(rng.randint(100, 1000))
+
+    cross_product_prices = {}
+    for _ in range(elasticities_per_product * num_products):
+        product_A = rng.randrange(num_products + extra_products)
+        product_B = rng.randrange(num_products + extra_products)
+        if one_way:
+            product_A, product_B = sorted((product_A, product_B))
+        key = (product_A, product_B, rng.randint(1, num_prices))
+        cross_product_prices[key] = round(rng.uniform(-max_impact, max_impact), 2)
+
+    min_margins = {}
+    for (product_id, _), margin in product_prices.items():
+        min_margins[product_id] = min(margin, min_margins.get(product_id, margin))
+
+    return product_prices, cross_product_prices, min_margins
+
+
+# Margin of a {product: price} solution, one elasticity at a time
+def plain_margin(
+    solution, product_prices, cross_product_prices, lambda_force_price=500
+):
+    total_margin = sum(
+        product_prices.get((product_id, price), 0)
+        for product_id, price in solution.items()
+    )
+    if None in solution.values():
+        total_margin -= lambda_force_price
+
+    for (product_A, product_B, price_A), impact in cross_product_prices.items():
+        if solution.get(product_A) == price_A and product_B in solution:
+            affected_margin = product_prices.get((product_B, solution[product_B]), 0)
+            total_margin += affected_margin * impact / 100
+
+    return total_margin
+
+
+# Best margin of the products with price rows by enumerating every
+# combination of the given prices
+def brute_force_margin(
+    product_prices, cross_product_prices, price_ids, lambda_force_price=500
+):
+    products = sorted({product_id for product_id, _ in product_prices})
+
+    return max(
+        plain_margin(
+            dict(zip(products, combination)),
+            product_prices,
+            cross_product_prices,
+            lambda_force_price,
+        )
+        for combination in product(price_ids, repeat=len(products))
+    )
+
+
+# Energies of the 0/1 states (one per row) of QUBO arrays
+def qubo_energies(qubo, states):
+    states = np.asarray(states, dtype=float)
+
+    return (
+        qubo.offset
+        + states @ qubo.linear
+        + (qubo.values * states[:, qubo.rows] * states[:, qubo.cols]).sum(axis=1)
+    )
@@ -0,0 +1,102 @@
+import random
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from helpers import random_price_data
+from utils.build_qubo_matrix import (
+    build_qubo_arrays,
+    build_qubo_matrix,
+    variable_label,
+)
+
+
+# QUBO of the price data built one term at a time over string labels
+def plain_qubo(
+    product_prices,
+    cross_product_prices,
+    min_margins,
+    lambda_maximize_margins=1,
+    lambda_price_uniqueness=5000,
+    lambda_elasticity=1,
+    lambda_force_price_product=1000,
+):
+    Q = defaultdict(int)
+    for (i, p), margin in product_prices.items():
+        var = variable_label(i, p)
+        Q[(var, var)] -= lambda_maximize_margins * (margin - min_margins[i])
+        Q[(var, var)] -= lambda_force_price_product
+
+    for i1, p1 in product_prices:
+        for i2, p2 in product_prices:
+            if i1 == i2 and p1 != p2:
+                Q[
+                    (variable_label(i1, p1), variable_label(i2, p2))
+                ] += lambda_price_uniqueness
+
+    for (i1, i2, p), margin_percentage in cross_product_prices.items():
+        if (i1, p) not in product_prices:
+            continue
+        for (i, p2), margin in product_prices.items():
+            if i == i2:
+                Q[(variable_label(i1, p), variable_label(i2, p2))] -= (
+                    lambda_elasticity * margin * margin_percentage / 100
+                )
+
+    return Q
+
+
+# Energies of a string-keyed QUBO for 0/1 states over the given labels
+def energies(Q, labels, states):
+    columns = {label: k for k, label in enumerate(labels)}
+    total = np.zeros(len(states))
+    for (u, v), bias in Q.items():
+        total += bias * states[:, columns[u]] * states[:, columns[v]]
+
+    return total
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_the_plain_qubo(seed):
+    rng = random.Random(seed)
+    data = random_price_data(
+        rng, rng.randint(1, 6), num_prices=4, price_probability=0.7, extra_products=1
+    )
+    lambdas = {
+        "lambda_maximize_margins": 2,
+        "lambda_price_uniqueness": 300,
+        "lambda_elasticity": 0.5,
+        "lambda_force_price_product": 200,
+    }
+
+    Q = build_qubo_matrix(*data, **lambdas)
+    expected = plain_qubo(*data, **lambdas)
+
+    labels = sorted({label for key in expected for label in key})
+    assert sorted({label for key in Q for label in key}) == labels
+    states = np.random.default_rng(seed).integers(0, 2, size=(200, len(labels)))
+    np.testing.assert_allclose(
+        energies(Q, labels, states), energies(expected, labels, states)
+    )
+
+
+def test_arrays_are_indexed_by_sorted_variables():
+    product_prices = {(2, 1): 10.0, (1, 2): 30.0, (1, 1): 20.0}
+    qubo = build_qubo_arrays(
+        product_prices, {(1, 2, 1): 10}, {1: 20.0, 2: 10.0}, lambda_price_uniqueness=5
+    )
+
+    assert qubo.variables == [(1, 1), (1, 2), (2, 1)]
+    np.testing.assert_allclose(qubo.linear, [-1000, -1010, -1000])
+    assert sorted(
+        zip(qubo.rows.tolist(), qubo.cols.tolist(), qubo.values.tolist())
+    ) == [
+        (0, 1, 10.0),
+        (0, 2, -1.0),
+    ]
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError, match="Encoding"):
+        build_qubo_arrays({(1, 1): 10.0}, {}, {1: 10.0}, encoding="binary")
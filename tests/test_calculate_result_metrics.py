@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calculate_result_metrics import calculate_result_metrics, result_metrics
+
+
+# Adjusted margins applying the elasticities one row at a time
+def plain_adjusted_margins(df_solutions, df_prices, df_elasticities):
+    df_merged = df_solutions.merge(df_prices, how="left", on=["product", "price"])
+    adjusted = df_merged["margin_of_sales"].astype(float).tolist()
+    for _, row in df_elasticities.iterrows():
+        for k, product in enumerate(df_merged["product"]):
+            if product == row["affected_product_B"]:
+                adjusted[k] *= 1 + row["affected_margin_B"] / 100
+
+    return adjusted
+
+
+def test_matches_the_plain_adjusted_margins():
+    rng = np.random.default_rng(0)
+    df_solutions = pd.DataFrame(
+        {"product": np.arange(20), "price": rng.integers(1, 4, 20), "cluster": 1}
+    )
+    df_prices = pd.DataFrame(
+        [
+            (product, price, rng.integers(100, 1000))
+            for product in range(20)
+            for price in range(1, 4)
+        ],
+        columns=["product", "price", "margin_of_sales"],
+    )
+    df_elasticities = pd.DataFrame(
+        {
+            "product_A": rng.integers(0, 25, 100),
+            "affected_product_B": rng.integers(0, 25, 100),
+            "price_A": rng.integers(1, 4, 100),
+            "affected_margin_B": rng.uniform(-30, 30, 100).round(2),
+        }
+    )
+
+    metrics = result_metrics(df_solutions, df_prices, df_elasticities)
+
+    expected = plain_adjusted_margins(df_solutions, df_prices, df_elasticities)
+    np.testing.assert_allclose(
+        [result["adjusted_margin"] for result in metrics["results"]], expected
+    )
+    assert metrics["total_expected_margin"] == pytest.approx(sum(expected))
+    assert [result["product"] for result in metrics["results"]] == list(range(20))
+
+
+def test_files(tmp_path):
+    (tmp_path / "solutions.csv").write_text("product;price;cluster\n1;2;1\n2;1;2\n")
+    (tmp_path / "prices.csv").write_text(
+        "product;price;margin_of_sales\n1;1;50\n1;2;100\n2;1;200\n"
+    )
+    (tmp_path / "cross.csv").write_text(
+        "product_A;affected_product_B;price_A;affected_margin_B\n"
+        "2;1;1;10\n2;1;2;10\n1;3;2;50\n"
+    )
+
+    metrics = calculate_result_metrics(
+        tmp_path / "solutions.csv", tmp_path / "prices.csv", tmp_path / "cross.csv"
+    )
+
+    # Every elasticity of a product multiplies its margin
+    assert metrics["results"] == [
+        {"product": 1, "price": 2, "cluster": 1, "adjusted_margin": pytest.approx(121)},
+        {"product": 2, "price": 1, "cluster": 2, "adjusted_margin": 200},
+    ]
+    assert metrics["total_expected_margin"] == pytest.approx(321)
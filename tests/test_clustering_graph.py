@@ -0,0 +1,97 @@
+import random
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from clustering import build_graph_from_cross_elasticities
+from clustering.utils import save_partition_data, save_subgraph_data
+from helpers import random_price_data
+from utils import build_qubo_arrays
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_edge_weights(seed):
+    rng = random.Random(seed)
+    _, cross_product_prices, _ = random_price_data(
+        rng, 8, num_prices=4, price_probability=0.7
+    )
+
+    graph = build_graph_from_cross_elasticities(cross_product_prices)
+
+    # Both directions of a pair of products add up, a self-loop counts once
+    weights = defaultdict(float)
+    for (product_A, product_B, _), impact in cross_product_prices.items():
+        weights[tuple(sorted((product_A, product_B)))] += abs(impact)
+    nx_graph = graph.to_networkx()
+    assert graph.num_edges == nx_graph.number_of_edges() == len(weights)
+    for (product_A, product_B), weight in weights.items():
+        assert nx_graph[product_A][product_B]["weight"] == pytest.approx(weight)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_qubo_sizes(seed):
+    rng = random.Random(seed)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng, 8, num_prices=4, price_probability=0.7, one_way=True
+    )
+    graph = build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+
+    # Sizes of the QUBO of a random subset of the products
+    indices = np.sort(rng.sample(range(len(graph)), 5))
+    products = set(graph.products[indices].tolist())
+    qubo = build_qubo_arrays(
+        {key: value for key, value in product_prices.items() if key[0] in products},
+        {
+            key: value
+            for key, value in cross_product_prices.items()
+            if key[0] in products
+        },
+        {product: 0 for product in products},
+    )
+    pairs = set(zip(qubo.rows.tolist(), qubo.cols.tolist()))
+
+    assert graph.num_variables(indices) == len(qubo.linear)
+    assert graph.num_connections(indices) == len(qubo.linear) + len(pairs)
+
+
+def test_domain_wall_sizes():
+    product_prices = {(1, 1): 10.0, (1, 2): 20.0, (1, 3): 30.0, (2, 1): 5.0}
+    graph = build_graph_from_cross_elasticities(
+        {}, product_prices, encoding="domain_wall"
+    )
+
+    assert graph.node_weights.tolist() == [2, 0]
+
+    with pytest.raises(ValueError, match="Encoding"):
+        build_graph_from_cross_elasticities({}, product_prices, encoding="binary")
+
+
+@pytest.mark.parametrize("max_open_files", [2, 256])
+def test_partition_files_match_the_subgraph_files(tmp_path, max_open_files):
+    rng = random.Random(0)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng, 12, num_prices=4, price_probability=0.7
+    )
+    graph = build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+    subgraphs = [graph.subgraph(rows) for rows in ([0, 3, 4], [1, 2, 5, 6], [7])]
+
+    save_partition_data(
+        subgraphs,
+        product_prices,
+        cross_product_prices,
+        tmp_path / "a",
+        max_open_files=max_open_files,
+    )
+    for index, subgraph in enumerate(subgraphs, start=1):
+        save_subgraph_data(
+            subgraph, product_prices, cross_product_prices, tmp_path / "b", "", index
+        )
+
+    names = sorted(path.name for path in (tmp_path / "a").iterdir())
+    assert names == sorted(path.name for path in (tmp_path / "b").iterdir())
+    assert len(names) == 6
+    for name in names:
+        assert (tmp_path / "a" / name).read_text() == (
+            tmp_path / "b" / name
+        ).read_text()
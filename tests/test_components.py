@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from clustering import build_graph_from_cross_elasticities, component_clustering
+
+
+# Products 0..num_products-1 with num_prices prices each
+def price_rows(products, num_prices):
+    return {
+        (product, price): 100 * price
+        for product in products
+        for price in range(1, num_prices + 1)
+    }
+
+
+def test_components_are_kept_whole():
+    product_prices = price_rows(range(6), 2)
+    cross_product_prices = {(0, 1, 1): 5, (1, 2, 2): -3, (3, 4, 1): 2}
+    graph = build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+
+    subgraphs = component_clustering(graph, "kernighan_lin", 20, 400)
+
+    # Both components fit together, the isolated product goes last
+    assert [subgraph.nodes() for subgraph in subgraphs] == [[0, 1, 2, 3, 4], [5]]
+
+
+def test_isolated_products_are_split_by_budget():
+    product_prices = price_rows(range(10), 3)
+    product_prices.update(price_rows([10], 30))
+    graph = build_graph_from_cross_elasticities({}, product_prices)
+
+    subgraphs = component_clustering(graph, "kernighan_lin", 20, 400)
+
+    # Six products of 3 prices per cluster, and the product with 30 prices
+    # alone, as it is solved without QUBO
+    assert [subgraph.nodes() for subgraph in subgraphs] == [
+        [0, 1, 2, 3, 4, 5],
+        [6, 7, 8, 9],
+        [10],
+    ]
+
+
+def test_coupled_product_over_the_budget():
+    product_prices = price_rows(range(3), 2)
+    product_prices.update(price_rows([3], 30))
+    graph = build_graph_from_cross_elasticities({(3, 0, 1): 5}, product_prices)
+
+    with pytest.raises(ValueError, match=r"\[3\]"):
+        component_clustering(graph, "kernighan_lin", 20, 400)
+
+
+@pytest.mark.parametrize("method", ["kernighan_lin", "louvain_spectral"])
+def test_large_component_is_partitioned(method):
+    rng = np.random.default_rng(0)
+    product_prices = price_rows(range(60), 2)
+    cross_product_prices = {
+        (int(a), int(b), 1): 5.0
+        for a, b in zip(rng.integers(0, 60, 200), rng.integers(0, 60, 200))
+    }
+    graph = build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+
+    subgraphs = component_clustering(graph, method, 20, 400)
+
+    products = sorted(product for subgraph in subgraphs for product in subgraph)
+    assert products == list(range(60))
+    for subgraph in subgraphs:
+        assert subgraph.fits(np.arange(len(subgraph)), 20, 400)
@@ -0,0 +1,66 @@
+import random
+from itertools import product
+
+import numpy as np
+import pytest
+
+from helpers import qubo_energies, random_price_data
+from utils.build_qubo_matrix import (
+    build_qubo_arrays,
+    build_variable_index,
+    domain_wall_to_one_hot,
+    domain_wall_variables,
+)
+
+
+def test_decoding():
+    variable_index = build_variable_index(
+        {(1, 1): 0, (1, 2): 0, (1, 3): 0, (2, 1): 0, (3, 1): 0, (3, 2): 0}
+    )
+    assert domain_wall_variables(variable_index) == [(1, 2), (1, 3), (3, 2)]
+
+    one_hot = domain_wall_to_one_hot(
+        [[0, 0, 0], [1, 0, 1], [1, 1, 0], [0, 1, 1]], variable_index
+    )
+
+    # The price is given by the first wall set to 0
+    assert one_hot.tolist() == [
+        [1, 0, 0, 1, 1, 0],
+        [0, 1, 0, 1, 0, 1],
+        [0, 0, 1, 1, 1, 0],
+        [1, 0, 0, 1, 0, 1],
+    ]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_domain_wall_optimum_matches_one_hot(seed):
+    rng = random.Random(seed)
+    data = random_price_data(rng, rng.randint(1, 4), num_prices=4, variable_prices=True)
+    variable_index = build_variable_index(data[0])
+
+    one_hot_qubo = build_qubo_arrays(
+        *data, lambda_price_uniqueness=0, lambda_force_price_product=0
+    )
+    wall_qubo = build_qubo_arrays(*data, encoding="domain_wall")
+    assert wall_qubo.variables == domain_wall_variables(variable_index)
+
+    # Every state of the walls, valid or not
+    num_walls = len(wall_qubo.variables)
+    walls = np.array(list(product([0, 1], repeat=num_walls))).reshape(
+        2**num_walls, num_walls
+    )
+    wall_energies = qubo_energies(wall_qubo, walls)
+    one_hot_energies = qubo_energies(
+        one_hot_qubo, domain_wall_to_one_hot(walls, variable_index)
+    )
+
+    # Valid walls have the energy of their prices, and the rest are penalized
+    wall_products = np.repeat(
+        np.arange(len(variable_index.counts)), variable_index.counts - 1
+    )
+    valid = np.ones(len(walls), dtype=bool)
+    for k in range(1, walls.shape[1]):
+        if wall_products[k] == wall_products[k - 1]:
+            valid &= walls[:, k] <= walls[:, k - 1]
+    np.testing.assert_allclose(wall_energies[valid], one_hot_energies[valid])
+    assert wall_energies.min() == pytest.approx(one_hot_energies.min())
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from elastic_pricing_classic import (
+    branch_and_bound_solver,
+    calculate_margin_with_restriction,
+    classical_solver_with_restriction,
+)
+from helpers import brute_force_margin, random_price_data
+
+
+def test_margin_of_a_solution():
+    product_prices = {(1, 1): 100, (1, 2): 80, (2, 1): 50, (2, 2): 60}
+    cross_product_prices = {(1, 2, 1): 10, (2, 2, 2): -50, (3, 1, 1): 20}
+
+    # 100 + 60 - 50% of 60 on itself + 10% of 60 from product 1
+    assert calculate_margin_with_restriction(
+        {1: 1, 2: 2}, product_prices, cross_product_prices
+    ) == pytest.approx(136)
+
+    # Products outside the solution neither count nor are penalized
+    assert calculate_margin_with_restriction(
+        {1: 1}, product_prices, cross_product_prices
+    ) == pytest.approx(100)
+
+    # A product without price rows still triggers its elasticities
+    assert calculate_margin_with_restriction(
+        {1: 1, 3: 1}, product_prices, cross_product_prices
+    ) == pytest.approx(120)
+
+    # Products without price are penalized
+    assert calculate_margin_with_restriction(
+        {1: 1, 2: None}, product_prices, cross_product_prices, lambda_force_price=500
+    ) == pytest.approx(-400)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_solvers_find_the_best_margin(seed):
+    rng = random.Random(seed)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng, rng.randint(1, 5), price_probability=0.8
+    )
+    price_ids = [1, 2, 3] + ([None] if seed % 2 else [])
+
+    best_margin = brute_force_margin(product_prices, cross_product_prices, price_ids)
+
+    solution, margin = classical_solver_with_restriction(
+        product_prices, cross_product_prices, price_ids, batch_size=7
+    )
+    assert margin == pytest.approx(best_margin)
+    assert calculate_margin_with_restriction(
+        solution, product_prices, cross_product_prices
+    ) == pytest.approx(best_margin)
+
+    solution, margin = branch_and_bound_solver(
+        product_prices, cross_product_prices, price_ids
+    )
+    assert margin == pytest.approx(best_margin)
+    assert calculate_margin_with_restriction(
+        solution, product_prices, cross_product_prices
+    ) == pytest.approx(best_margin)
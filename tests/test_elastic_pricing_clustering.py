@@ -0,0 +1,161 @@
+import random
+import importlib
+
+import pytest
+
+import elastic_pricing_clustering
+from clustering import build_graph_from_cross_elasticities
+from clustering.utils import save_partition_data
+from elastic_pricing_classic import classical_solver_with_restriction
+from elastic_pricing_clustering import solve_and_integrate
+
+
+# Cluster files of a few clusters of coupled products, numbered from 1, and a
+# product without elasticities on other products, in a cluster of its own or
+# in the last cluster
+def write_clusters(
+    folder, seed, num_clusters=3, cluster_size=3, independent_cluster=True
+):
+    rng = random.Random(seed)
+    num_products = num_clusters * cluster_size + 1
+    product_prices = {
+        (product, price): float(rng.randint(100, 1000))
+        for product in range(1, num_products + 1)
+        for price in (1, 2, 3)
+    }
+    cross_product_prices = {}
+    for cluster in range(num_clusters):
+        products = range(cluster * cluster_size + 1, (cluster + 1) * cluster_size + 1)
+        for _ in range(2 * cluster_size):
+            key = (rng.choice(products), rng.choice(products), rng.randint(1, 3))
+            cross_product_prices[key] = round(rng.uniform(-30, 30), 2)
+    cross_product_prices[(num_products, num_products, 2)] = 50.0
+
+    graph = build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+    bounds = [cluster * cluster_size for cluster in range(num_clusters + 1)]
+    bounds.append(num_products)
+    if not independent_cluster:
+        del bounds[-2]
+    subgraphs = [
+        graph.subgraph(range(start, end)) for start, end in zip(bounds, bounds[1:])
+    ]
+    save_partition_data(subgraphs, product_prices, cross_product_prices, folder)
+
+    return product_prices, cross_product_prices
+
+
+def read_solution(output_file):
+    with open(output_file) as f:
+        return f.read()
+
+
+def best_prices(output_file):
+    rows = [line.split(";") for line in read_solution(output_file).splitlines()[1:]]
+
+    return {int(product): int(price) for product, price, _ in rows}
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_exact_solvers_find_the_best_prices(tmp_path, seed):
+    product_prices, cross_product_prices = write_clusters(tmp_path / "clusters", seed)
+
+    solution, _ = classical_solver_with_restriction(
+        product_prices, cross_product_prices, [1, 2, 3]
+    )
+    for solver_type in ["exact", "gray"]:
+        output_file = tmp_path / f"{solver_type}.csv"
+        response = solve_and_integrate(
+            tmp_path / "clusters", output_file, solver_type=solver_type
+        )
+
+        assert response["num_products"] == 10
+        assert best_prices(output_file) == solution
+
+
+def test_workers_and_local_solvers(tmp_path):
+    write_clusters(tmp_path / "clusters", seed=0)
+    solve_and_integrate(tmp_path / "clusters", tmp_path / "exact.csv", "exact")
+
+    for solver_type in ["simulated", "tabu"]:
+        output_file = tmp_path / f"{solver_type}.csv"
+        solve_and_integrate(
+            tmp_path / "clusters", output_file, solver_type, seed=1, workers=2
+        )
+
+        assert read_solution(output_file) == read_solution(tmp_path / "exact.csv")
+
+
+def test_single_cluster_gives_the_workers_to_the_gray_solver(tmp_path, monkeypatch):
+    write_clusters(
+        tmp_path / "clusters",
+        seed=1,
+        num_clusters=1,
+        cluster_size=6,
+        independent_cluster=False,
+    )
+    solve_and_integrate(tmp_path / "clusters", tmp_path / "exact.csv", "exact")
+
+    # The function solve_qubo_model hides its module in the utils package
+    solver_module = importlib.import_module("utils.solve_qubo_model")
+    solve_one_hot_qubo = solver_module.solve_one_hot_qubo
+    solver_workers = []
+
+    def record_workers(*args, workers=1, **kwargs):
+        solver_workers.append(workers)
+        return solve_one_hot_qubo(*args, workers=workers, **kwargs)
+
+    monkeypatch.setattr(solver_module, "solve_one_hot_qubo", record_workers)
+    solve_and_integrate(tmp_path / "clusters", tmp_path / "gray.csv", "gray", workers=2)
+
+    assert solver_workers == [2]
+    assert read_solution(tmp_path / "gray.csv") == read_solution(tmp_path / "exact.csv")
+
+
+def test_cached_solutions(tmp_path, monkeypatch):
+    write_clusters(tmp_path / "clusters", seed=0)
+    cache_dir = tmp_path / "cache"
+
+    # Unseeded runs of random solvers are not cached
+    solve_and_integrate(
+        tmp_path / "clusters",
+        tmp_path / "simulated.csv",
+        "simulated",
+        cache_dir=cache_dir,
+    )
+    assert not cache_dir.exists() or not any(cache_dir.iterdir())
+
+    solve_and_integrate(
+        tmp_path / "clusters", tmp_path / "exact.csv", "exact", cache_dir=cache_dir
+    )
+    assert len(list(cache_dir.glob("*.npz"))) == 4
+
+    def fail(*args, **kwargs):
+        raise AssertionError("The cluster should come from the cache")
+
+    monkeypatch.setattr(elastic_pricing_clustering, "solve_cluster_files", fail)
+    solve_and_integrate(
+        tmp_path / "clusters", tmp_path / "cached.csv", "exact", cache_dir=cache_dir
+    )
+
+    assert read_solution(tmp_path / "cached.csv") == read_solution(
+        tmp_path / "exact.csv"
+    )
+
+
+def test_clusters_over_the_size_limits_are_reported(tmp_path):
+    write_clusters(tmp_path / "clusters", seed=0, num_clusters=1, cluster_size=8)
+    cache_dir = tmp_path / "cache"
+
+    # The 24 variables of the first cluster are over the limits of the exact
+    # solver, but not of the gray one
+    for _ in range(2):
+        response = solve_and_integrate(
+            tmp_path / "clusters", tmp_path / "exact.csv", "exact", cache_dir=cache_dir
+        )
+        assert response["skipped_clusters"] == ["1"]
+        assert response["num_products"] == 1
+    assert len(list(cache_dir.glob("*.npz"))) == 1
+
+    response = solve_and_integrate(tmp_path / "clusters", tmp_path / "gray.csv", "gray")
+    assert response["skipped_clusters"] == []
+    assert response["num_products"] == 9
@@ -0,0 +1,122 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from utils.gray_code_solver import solve_one_hot_qubo
+from utils.solve_qubo_model import solve_qubo_arrays
+
+
+# Random QUBO over groups of the given sizes, with upper triangular couplings
+def random_one_hot_qubo(sizes, seed):
+    rng = np.random.default_rng(seed)
+    groups = np.repeat(np.arange(len(sizes)), sizes)
+    num_variables = len(groups)
+    linear = rng.normal(size=num_variables)
+    rows, cols = np.triu_indices(num_variables)
+    keep = rng.random(len(rows)) < 0.5
+    rows = rows[keep]
+    cols = cols[keep]
+    values = rng.normal(size=len(rows))
+
+    return linear, rows, cols, values, groups
+
+
+# Energies of all the states with one variable per group, in increasing order
+def brute_force_energies(linear, rows, cols, values, groups, offset):
+    members = [np.flatnonzero(groups == group) for group in np.unique(groups)]
+    energies = []
+    for chosen in product(*members):
+        state = np.zeros(len(linear))
+        state[list(chosen)] = 1
+        energies.append(
+            offset + linear @ state + (values * state[rows] * state[cols]).sum()
+        )
+
+    return np.sort(energies)
+
+
+def energy_of(sample, linear, rows, cols, values, offset):
+    return offset + linear @ sample + (values * sample[rows] * sample[cols]).sum()
+
+
+@pytest.mark.parametrize(
+    "sizes, block_size",
+    [([3, 2, 4, 1, 3], 4096), ([3, 2, 4, 1, 3], 4), ([2, 5, 3, 3], 1), ([4], 4096)],
+)
+def test_best_states_match_brute_force(sizes, block_size):
+    linear, rows, cols, values, groups = random_one_hot_qubo(sizes, seed=len(sizes))
+
+    samples, energies = solve_one_hot_qubo(
+        linear,
+        rows,
+        cols,
+        values,
+        groups,
+        offset=1.5,
+        num_reads=5,
+        block_size=block_size,
+    )
+
+    expected = brute_force_energies(linear, rows, cols, values, groups, 1.5)
+    np.testing.assert_allclose(energies, expected[:5])
+    for sample, energy in zip(samples, energies):
+        assert (np.bincount(groups, weights=sample) == 1).all()
+        assert energy_of(sample, linear, rows, cols, values, 1.5) == pytest.approx(
+            energy
+        )
+
+
+def test_workers_give_the_same_states():
+    linear, rows, cols, values, groups = random_one_hot_qubo([3, 4, 2, 3, 2], seed=7)
+
+    samples, energies = solve_one_hot_qubo(
+        linear, rows, cols, values, groups, num_reads=8, block_size=2
+    )
+    parallel_samples, parallel_energies = solve_one_hot_qubo(
+        linear, rows, cols, values, groups, num_reads=8, block_size=2, workers=2
+    )
+
+    np.testing.assert_allclose(parallel_energies, energies)
+    np.testing.assert_array_equal(parallel_samples[0], samples[0])
+
+
+def test_fewer_states_than_reads():
+    linear, rows, cols, values, groups = random_one_hot_qubo([2, 2], seed=3)
+
+    _, energies = solve_one_hot_qubo(linear, rows, cols, values, groups, num_reads=10)
+
+    np.testing.assert_allclose(
+        energies, brute_force_energies(linear, rows, cols, values, groups, 0)
+    )
+
+
+def test_too_many_states():
+    linear, rows, cols, values, groups = random_one_hot_qubo([4, 4, 4], seed=0)
+
+    with pytest.raises(ValueError, match="Too many states"):
+        solve_one_hot_qubo(linear, rows, cols, values, groups, max_states=63)
+
+
+def test_gray_solver_matches_the_exact_solver():
+    linear, rows, cols, values, groups = random_one_hot_qubo([3, 2, 3], seed=5)
+
+    # One-hot penalty, so that the exact optimum has one variable per group
+    penalty = 10 * (np.abs(linear).sum() + np.abs(values).sum())
+    members = [np.flatnonzero(groups == group) for group in np.unique(groups)]
+    pairs = np.array(
+        [(a, b) for m in members for a in m for b in m if a < b], dtype=np.int64
+    )
+    rows = np.concatenate([rows, pairs[:, 0]])
+    cols = np.concatenate([cols, pairs[:, 1]])
+    values = np.concatenate([values, np.full(len(pairs), 2 * penalty)])
+    linear = linear - penalty
+    offset = penalty * len(members)
+
+    exact = solve_qubo_arrays(linear, rows, cols, values, offset, solver_type="exact")
+    gray = solve_qubo_arrays(
+        linear, rows, cols, values, offset, solver_type="gray", groups=groups
+    )
+
+    assert gray.first.energy == pytest.approx(exact.first.energy)
+    assert gray.first.sample == exact.first.sample
@@ -0,0 +1,35 @@
+import sys
+import json
+import subprocess
+
+import pytest
+
+from benchmarks.benchmark_import_time import (
+    HEAVY_MODULES,
+    ROOT_DIR,
+    SCRIPTS,
+    time_import,
+)
+
+
+# The scripts load the solver and clustering backends only when they use them
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_scripts_load_no_heavy_modules(script):
+    assert time_import(script)["modules"] == []
+
+
+@pytest.mark.parametrize("package", ["utils", "clustering"])
+def test_packages_load_no_heavy_modules(package):
+    code = (
+        f"import sys, json, {package}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+    assert json.loads(output) == []
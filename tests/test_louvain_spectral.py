@@ -0,0 +1,58 @@
+import numpy as np
+
+from clustering import build_graph_from_cross_elasticities
+from clustering.louvain_spectral import (
+    louvain_spectral_clustering,
+    optimal_louvain_clusters,
+    spectral_clustering,
+)
+
+
+# Communities of products with strong elasticities inside and a few weak
+# ones between them, each product with two prices
+def community_graph(num_communities, size, seed=0):
+    rng = np.random.default_rng(seed)
+    cross_product_prices = {}
+    for community in range(num_communities):
+        products = community * size + np.arange(size)
+        for a, b in rng.choice(products, size=(3 * size, 2)):
+            cross_product_prices[(int(a), int(b), 1)] = 20.0
+    num_products = num_communities * size
+    for a, b in rng.integers(0, num_products, size=(num_communities, 2)):
+        cross_product_prices[(int(a), int(b), 2)] = 0.5
+    product_prices = {
+        (product, price): 100.0 for product in range(num_products) for price in (1, 2)
+    }
+
+    return build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+
+
+def test_sweep_workers_give_the_same_partition():
+    graph = community_graph(4, 10).to_networkx()
+
+    assert optimal_louvain_clusters(graph, 10, workers=2) == optimal_louvain_clusters(
+        graph, 10
+    )
+
+
+def test_spectral_subgraphs_fit():
+    graph = community_graph(3, 12)
+
+    subgraphs = spectral_clustering(graph, 20)
+
+    products = sorted(product for subgraph in subgraphs for product in subgraph)
+    assert products == graph.nodes()
+    assert all(
+        subgraph.num_variables(np.arange(len(subgraph))) <= 20 for subgraph in subgraphs
+    )
+
+
+def test_louvain_spectral_subgraphs_fit():
+    graph = community_graph(5, 8)
+
+    subgraphs = louvain_spectral_clustering(graph, 20, 10, max_connections=400)
+
+    products = sorted(product for subgraph in subgraphs for product in subgraph)
+    assert products == graph.nodes()
+    for subgraph in subgraphs:
+        assert subgraph.fits(np.arange(len(subgraph)), 20, 400)
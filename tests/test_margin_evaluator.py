@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from helpers import plain_margin, random_price_data
+from utils import MarginEvaluator, local_search
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_moves_match_the_full_margin(seed):
+    rng = random.Random(seed)
+    num_products = rng.randint(1, 6)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng, num_products, price_probability=0.8
+    )
+    prices = [1, 2, 3, None]
+
+    evaluator = MarginEvaluator(
+        product_prices,
+        cross_product_prices,
+        {product: rng.choice(prices) for product in range(num_products)},
+    )
+    assert evaluator.margin == pytest.approx(
+        plain_margin(evaluator.solution, product_prices, cross_product_prices)
+    )
+
+    for _ in range(20):
+        committed = dict(evaluator.solution)
+        committed_margin = evaluator.margin
+
+        for _ in range(rng.randint(1, 4)):
+            product = rng.randrange(num_products)
+            price = rng.choice(prices)
+            delta = evaluator.delta(product, price)
+            assert evaluator.move(product, price) == delta
+            assert evaluator.margin == pytest.approx(
+                plain_margin(evaluator.solution, product_prices, cross_product_prices)
+            )
+
+        if rng.random() < 0.5:
+            evaluator.rollback()
+            assert evaluator.solution == committed
+            assert evaluator.margin == pytest.approx(committed_margin)
+        else:
+            evaluator.commit()
+
+
+def test_local_search_stops_at_a_local_optimum():
+    product_prices = {(1, 1): 100, (1, 2): 80, (2, 1): 50, (2, 2): 60}
+    cross_product_prices = {(1, 2, 2): 50, (2, 1, 1): -10}
+    domains = {1: [1, 2], 2: [1, 2]}
+
+    evaluator = MarginEvaluator(product_prices, cross_product_prices, {1: 1, 2: 1})
+    solution, margin = local_search(evaluator, domains)
+
+    # 80 + 60 + 50% of 60 from product 1 at price 2
+    assert solution == {1: 2, 2: 2}
+    assert margin == pytest.approx(170)
+    assert all(
+        evaluator.delta(product, price) <= 1e-9
+        for product, domain in domains.items()
+        for price in domain
+    )
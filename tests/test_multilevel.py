@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from clustering import build_graph_from_cross_elasticities, kernighan_lin_clustering
+from clustering.multilevel import bisection_gains, multilevel_bisection
+from helpers import random_price_data
+
+
+# Two dense communities of size nodes joined by a few bridge edges
+def two_communities(size, num_bridges, seed=0):
+    rng = np.random.default_rng(seed)
+    rows, cols = [], []
+    for offset in (0, size):
+        pairs = rng.integers(0, size, (8 * size, 2)) + offset
+        rows.extend(pairs[:, 0])
+        cols.extend(pairs[:, 1])
+    rows.extend(rng.integers(0, size, num_bridges))
+    cols.extend(rng.integers(size, 2 * size, num_bridges))
+
+    directed = sparse.coo_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(2 * size, 2 * size)
+    ).tocsr()
+    directed.setdiag(0)
+    directed.eliminate_zeros()
+
+    return (directed + directed.T).tocsr()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bisection_separates_communities(seed):
+    adjacency = two_communities(150, 3, seed)
+
+    side = multilevel_bisection(adjacency, seed=seed)
+
+    # Coarsened below 100 nodes and refined back, the cut is the bridges
+    assert (side[:150] == side[0]).all() and (side[150:] != side[0]).all()
+    assert bisection_gains(adjacency, side)[0] <= 3
+
+
+def test_bisection_is_balanced():
+    rng = np.random.default_rng(0)
+    adjacency = sparse.random(400, 400, density=0.02, random_state=1, format="csr")
+    adjacency = (adjacency + adjacency.T).tocsr()
+    node_weights = rng.integers(1, 4, 400).astype(float)
+
+    side = multilevel_bisection(adjacency, node_weights, seed=0)
+
+    assert side.any() and not side.all()
+    difference = abs(node_weights[side].sum() - node_weights[~side].sum())
+    assert difference <= 0.1 * node_weights.sum()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_clusters_fit_in_the_budget(workers):
+    product_prices, cross_product_prices, _ = random_price_data(
+        random.Random(0),
+        300,
+        num_prices=4,
+        variable_prices=True,
+        elasticities_per_product=2,
+    )
+    graph = build_graph_from_cross_elasticities(cross_product_prices, product_prices)
+
+    subgraphs = kernighan_lin_clustering(
+        graph, 40, workers=workers, seed=0, max_connections=400
+    )
+
+    # Every product is in exactly one cluster, and every cluster fits
+    products = np.concatenate([subgraph.products for subgraph in subgraphs])
+    assert sorted(products.tolist()) == graph.products.tolist()
+    for subgraph in subgraphs:
+        rows = np.arange(len(subgraph))
+        assert subgraph.fits(rows, 40, 400)
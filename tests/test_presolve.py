@@ -0,0 +1,105 @@
+import random
+from itertools import product
+
+import numpy as np
+import pytest
+
+from helpers import qubo_energies, random_price_data
+from utils.build_qubo_matrix import build_qubo_arrays, build_variable_index
+from utils.presolve import dominated_prices, fix_bqm_variables, remove_dominated_prices
+from utils.solve_qubo_model import sample_bqm
+
+
+# Lowest energy of the objective over the states with one price per product
+def best_one_hot_energy(product_prices, cross_product_prices, min_margins):
+    qubo = build_qubo_arrays(
+        product_prices,
+        cross_product_prices,
+        min_margins,
+        lambda_price_uniqueness=0,
+        lambda_force_price_product=0,
+    )
+    variable_index = build_variable_index(product_prices)
+    members = [
+        range(start, start + count)
+        for start, count in zip(variable_index.starts, variable_index.counts)
+    ]
+
+    states = np.zeros((np.prod(variable_index.counts), len(qubo.linear)))
+    for state, chosen in zip(states, product(*members)):
+        state[list(chosen)] = 1
+
+    return qubo_energies(qubo, states).min()
+
+
+def test_dominated_price_is_found():
+    product_prices = {(1, 1): 100.0, (1, 2): 500.0, (2, 1): 300.0, (2, 2): 200.0}
+    cross_product_prices = {(1, 2, 2): 10}
+    min_margins = {1: 100.0, 2: 200.0}
+
+    qubo = build_qubo_arrays(
+        product_prices,
+        cross_product_prices,
+        min_margins,
+        lambda_price_uniqueness=0,
+        lambda_force_price_product=0,
+    )
+    dominated = dominated_prices(qubo, build_variable_index(product_prices))
+
+    # Price 2 of product 2 loses 100 and wins at most 10% of 200
+    assert dominated.tolist() == [True, False, False, True]
+
+    reduced_prices, reduced_cross, num_removed = remove_dominated_prices(
+        product_prices, cross_product_prices, min_margins
+    )
+    assert num_removed == 2
+    assert reduced_prices == {(1, 2): 500.0, (2, 1): 300.0}
+    assert reduced_cross == {(1, 2, 2): 10}
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_removing_dominated_prices_keeps_the_optimum(seed):
+    # Strong elasticities, so that only some prices are dominated
+    rng = random.Random(seed)
+    product_prices, cross_product_prices, min_margins = random_price_data(
+        rng, rng.randint(2, 5), elasticities_per_product=2, max_impact=60
+    )
+
+    reduced_prices, reduced_cross, num_removed = remove_dominated_prices(
+        product_prices, cross_product_prices, min_margins
+    )
+
+    assert len(reduced_prices) == len(product_prices) - num_removed
+    assert {product for product, _ in reduced_prices} == set(min_margins)
+    assert best_one_hot_energy(
+        reduced_prices, reduced_cross, min_margins
+    ) == pytest.approx(
+        best_one_hot_energy(product_prices, cross_product_prices, min_margins)
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fixed_variables_keep_the_minimum(seed):
+    from dimod import BinaryQuadraticModel
+
+    # Prices of a few products, which roof duality cannot fix, and variables
+    # with strong biases weakly coupled to them, which it fixes
+    rng = random.Random(seed)
+    qubo = build_qubo_arrays(
+        *random_price_data(rng, 3, elasticities_per_product=2, max_impact=60)
+    )
+    bqm = BinaryQuadraticModel.from_numpy_vectors(
+        qubo.linear, (qubo.rows, qubo.cols, qubo.values), qubo.offset, "BINARY"
+    )
+    for k in range(4):
+        label = len(qubo.linear) + k
+        bqm.add_linear(label, rng.choice([-1, 1]) * rng.uniform(50, 100))
+        bqm.add_quadratic(label, rng.randrange(len(qubo.linear)), rng.uniform(-10, 10))
+
+    reduced, fixed = fix_bqm_variables(bqm)
+
+    assert len(fixed) == 4
+    assert reduced.num_variables == bqm.num_variables - len(fixed)
+    best = sample_bqm(bqm).first
+    assert all(best.sample[variable] == value for variable, value in fixed.items())
+    assert sample_bqm(reduced).first.energy == pytest.approx(best.energy)
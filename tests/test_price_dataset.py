@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pytest
+
+from utils import read_price_data
+from utils.price_dataset import PriceDataset, load_price_dataset
+
+
+# Price data files with repeated keys and elasticities with two decimals
+def write_price_files(directory, rng, num_rows):
+    prices_file = directory / "prices.csv"
+    cross_file = directory / "cross.csv"
+
+    with open(prices_file, "w") as f:
+        f.write("product;price;margin_of_sales\n")
+        for _ in range(num_rows):
+            f.write(f"{rng.randint(1, 20)};{rng.randint(1, 5)};{rng.randint(0, 999)}\n")
+
+    with open(cross_file, "w") as f:
+        f.write("product_A;affected_product_B;price_A;affected_margin_B\n")
+        for _ in range(num_rows):
+            f.write(
+                f"{rng.randint(1, 20)};{rng.randint(1, 20)};{rng.randint(1, 5)};"
+                f"{rng.uniform(-30, 30):.2f}\n"
+            )
+
+    return prices_file, cross_file
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1000000])
+def test_dicts_match_read_price_data(tmp_path, chunk_size):
+    prices_file, cross_file = write_price_files(tmp_path, random.Random(0), 300)
+
+    dataset = load_price_dataset(prices_file, cross_file, chunk_size=chunk_size)
+
+    expected = read_price_data(prices_file, cross_file)
+    assert dataset.as_dicts() == expected
+    assert dataset.num_prices == len(expected[0])
+    assert dataset.num_elasticities == len(expected[1])
+
+
+def test_empty_files(tmp_path):
+    prices_file = tmp_path / "prices.csv"
+    cross_file = tmp_path / "cross.csv"
+    prices_file.write_text("product;price;margin_of_sales\n")
+    cross_file.write_text("product_A;affected_product_B;price_A;affected_margin_B\n")
+
+    dataset = load_price_dataset(prices_file, cross_file)
+
+    assert dataset.as_dicts() == ({}, {}, {})
+    assert dataset.products.dtype == np.int32
+
+
+def test_decimal_elasticities():
+    elasticities = np.array([0.1, -12.34, 25.5], dtype=np.float32)
+    empty = np.empty(0, dtype=np.int32)
+    dataset = PriceDataset(empty, empty, empty, empty, empty, empty, elasticities)
+
+    assert dataset.decimal_elasticities().tolist() == [0.1, -12.34, 25.5]
+    assert PriceDataset.decimal_value(elasticities[1]) == -12.34
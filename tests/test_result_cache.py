@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.result_cache import ResultCache, content_key
+
+
+def write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_key_of_the_content_and_params(tmp_path):
+    first = tmp_path / "a.csv"
+    second = tmp_path / "b.csv"
+    write(first, "product;price\n1;1\n")
+    write(second, "product;price\n1;1\n")
+
+    key = content_key([first], {"solver": "exact", "seed": 1})
+
+    # The key only depends on the content, not on the path or the key order
+    assert content_key([second], {"seed": 1, "solver": "exact"}) == key
+    assert content_key([first], {"solver": "exact", "seed": 2}) != key
+
+    write(second, "product;price\n1;2\n")
+    assert content_key([second], {"solver": "exact", "seed": 1}) != key
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    samples = np.arange(12, dtype=np.int8).reshape(3, 4)
+    energies = np.array([-3.0, -2.5, 1.0])
+
+    assert cache.get("key") is None
+
+    cache.put("key", samples=samples, energies=energies)
+    entry = cache.get("key")
+
+    assert sorted(entry) == ["energies", "samples"]
+    np.testing.assert_array_equal(entry["samples"], samples)
+    np.testing.assert_array_equal(entry["energies"], energies)
+    assert cache.get("other") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResultCache(tmp_path)
+    rng = np.random.default_rng(0)
+    keys = ["first", "second", "third", "fourth"]
+    for k, key in enumerate(keys):
+        cache.put(key, values=rng.random(1000))
+        os.utime(cache._path(key), ns=(k * 10**9, k * 10**9))
+    sizes = {key: os.path.getsize(cache._path(key)) for key in keys}
+
+    # Reading the first entry makes the second the least recently used
+    assert cache.get("first") is not None
+    cache.max_bytes = sum(sizes.values()) - sizes["second"]
+    cache.evict()
+
+    assert cache.get("second") is None
+    for key in ["first", "third", "fourth"]:
+        assert cache.get(key) is not None
+
+
+def test_failed_write_leaves_no_files(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path)
+
+    def fail(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(np, "savez_compressed", fail)
+    with pytest.raises(OSError):
+        cache.put("key", values=np.zeros(3))
+
+    assert os.listdir(tmp_path) == []
+    assert cache.get("key") is None
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    write(cache._path("key"), "not a zip file")
+
+    assert cache.get("key") is None
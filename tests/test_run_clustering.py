@@ -0,0 +1,73 @@
+import filecmp
+import importlib.util
+import os
+
+import numpy as np
+import pytest
+
+from clustering import run_clustering
+
+
+# Price files of a catalog whose elasticities connect most of the products,
+# so that the components must be partitioned
+def write_price_files(directory, num_products=60, seed=0):
+    rng = np.random.default_rng(seed)
+    prices_file = directory / "prices.csv"
+    cross_file = directory / "cross.csv"
+
+    with open(prices_file, "w") as f:
+        f.write("product;price;margin_of_sales\n")
+        for product in range(1, num_products + 1):
+            for price in (1, 2, 3):
+                f.write(f"{product};{price};{rng.integers(100, 1000)}\n")
+
+    with open(cross_file, "w") as f:
+        f.write("product_A;affected_product_B;price_A;affected_margin_B\n")
+        for _ in range(3 * num_products):
+            product_A, product_B = rng.integers(1, num_products + 1, 2)
+            f.write(
+                f"{product_A};{product_B};{rng.integers(1, 4)};"
+                f"{rng.uniform(-30, 30):.2f}\n"
+            )
+
+    return str(prices_file), str(cross_file)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("method", ["kernighan_lin", "louvain_spectral"])
+def test_same_catalog_gives_the_same_clusters(tmp_path, method, workers):
+    prices_file, cross_file = write_price_files(tmp_path)
+
+    for run in ("first", "second"):
+        run_clustering(method, tmp_path / run, prices_file, cross_file, workers=workers)
+
+    names = sorted(os.listdir(tmp_path / "first" / "clusters"))
+    assert len(names) > 2
+    assert names == sorted(os.listdir(tmp_path / "second" / "clusters"))
+    _, mismatch, errors = filecmp.cmpfiles(
+        tmp_path / "first" / "clusters",
+        tmp_path / "second" / "clusters",
+        names,
+        shallow=False,
+    )
+    assert mismatch == errors == []
+
+
+def test_eigen_solver_is_checked_first(tmp_path):
+    prices_file, cross_file = write_price_files(tmp_path)
+
+    with pytest.raises(ValueError, match="not supported"):
+        run_clustering(
+            "louvain_spectral", tmp_path, prices_file, cross_file, eigen_solver="qr"
+        )
+
+    if importlib.util.find_spec("pyamg") is None:
+        with pytest.raises(ValueError, match="pyamg"):
+            run_clustering(
+                "louvain_spectral",
+                tmp_path,
+                prices_file,
+                cross_file,
+                eigen_solver="amg",
+            )
+    assert not (tmp_path / "clusters").exists()
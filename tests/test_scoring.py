@@ -0,0 +1,103 @@
+import random
+
+import numpy as np
+import pytest
+
+from helpers import plain_margin, random_price_data
+from utils.build_qubo_matrix import build_variable_index
+from utils.postprocess import polish_samples
+from utils.scoring import MarginScorer
+
+
+def test_only_the_products_of_a_solution_count():
+    product_prices = {(1, 1): 100, (2, 1): 50}
+    cross_product_prices = {(1, 2, 1): 10, (3, 1, 1): 100}
+    scorer = MarginScorer(product_prices, cross_product_prices)
+
+    margins = scorer.score_solutions(
+        [{1: 1}, {1: 1, 2: 1}, {1: 1, 3: 1}, {1: 1, 2: None}, {}]
+    )
+
+    # The elasticity of product 3, without price rows, doubles product 1
+    np.testing.assert_allclose(margins, [100, 155, 200, -400, 0])
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_solutions_match_the_plain_margin(seed):
+    rng = random.Random(seed)
+    num_products = rng.randint(1, 6)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng,
+        num_products,
+        price_probability=0.8,
+        elasticities_per_product=4,
+        extra_products=2,
+    )
+    scorer = MarginScorer(product_prices, cross_product_prices, lambda_force_price=300)
+
+    # Any subset of the products, with prices without rows and without price
+    solutions = [
+        {
+            product: rng.choice([1, 2, 3, 4, None])
+            for product in range(num_products + 3)
+            if rng.random() < 0.7
+        }
+        for _ in range(50)
+    ]
+
+    np.testing.assert_allclose(
+        scorer.score_solutions(solutions),
+        [
+            plain_margin(solution, product_prices, cross_product_prices, 300)
+            for solution in solutions
+        ],
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_choices_match_the_solutions(seed):
+    rng = random.Random(seed)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng, rng.randint(1, 6), price_probability=0.8, extra_products=2
+    )
+    scorer = MarginScorer(product_prices, cross_product_prices)
+
+    prices = np.array(
+        [[rng.choice([1, 2, 3, None]) for _ in scorer.products] for _ in range(20)],
+        dtype=object,
+    )
+    solutions = [dict(zip(scorer.products, row)) for row in prices.tolist()]
+
+    choices = scorer.choices(prices)
+
+    assert choices.shape == prices.shape
+    assert ((choices == -1) == np.equal(prices, None)).all()
+    np.testing.assert_allclose(scorer.score(choices), scorer.score_solutions(solutions))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_polished_margins_match_the_scorer(seed):
+    rng = random.Random(seed)
+    product_prices, cross_product_prices, _ = random_price_data(
+        rng, rng.randint(2, 6), price_probability=0.8, extra_products=2
+    )
+    variable_index = build_variable_index(product_prices)
+    samples = np.random.default_rng(seed).integers(
+        0, 2, size=(8, len(variable_index.variables))
+    )
+
+    choices, margins = polish_samples(samples, product_prices, cross_product_prices)
+
+    scorer = MarginScorer(product_prices, cross_product_prices)
+    solutions = [
+        dict(variable_index.variables[variable] for variable in row)
+        for row in choices.tolist()
+    ]
+    np.testing.assert_allclose(margins, scorer.score_solutions(solutions))
+
+    # No single price change improves a polished solution
+    for solution, margin in zip(solutions, margins):
+        for product, price in product_prices:
+            changed = dict(solution)
+            changed[product] = price
+            assert scorer.score_solutions([changed])[0] <= margin + 1e-9
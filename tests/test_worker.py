@@ -0,0 +1,83 @@
+import io
+import json
+import os
+
+from worker import (
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    ComputeWorker,
+)
+
+
+def write_price_files(directory):
+    prices_file = directory / "prices.csv"
+    cross_file = directory / "cross.csv"
+    prices_file.write_text("product;price;margin_of_sales\n1;1;100\n1;2;80\n2;1;50\n")
+    cross_file.write_text(
+        "product_A;affected_product_B;price_A;affected_margin_B\n1;2;1;10\n"
+    )
+
+    return str(prices_file), str(cross_file)
+
+
+def test_protocol_errors():
+    worker = ComputeWorker()
+
+    assert worker.handle('{"jsonrpc": "2.0", "id": 1, "method": "ping"}') == {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "result": {"status": "success"},
+    }
+    assert worker.handle("{not json")["error"]["code"] == PARSE_ERROR
+    assert worker.handle("[1, 2]")["error"]["code"] == INVALID_REQUEST
+    assert (
+        worker.handle('{"id": 2, "method": "missing"}')["error"]["code"]
+        == METHOD_NOT_FOUND
+    )
+    response = worker.handle('{"id": 3, "method": "ping", "params": [1]}')
+    assert response["id"] == 3
+    assert response["error"]["code"] == INVALID_PARAMS
+
+    # Notifications are not answered
+    assert worker.handle('{"method": "ping"}') is None
+
+
+def test_datasets_are_reused_until_their_files_change(tmp_path):
+    prices_file, cross_file = write_price_files(tmp_path)
+    worker = ComputeWorker()
+
+    dataset = worker.cache.get(prices_file, cross_file)
+    assert worker.cache.get(prices_file, cross_file) is dataset
+
+    with open(prices_file, "a") as f:
+        f.write("2;2;70\n")
+    stat = os.stat(prices_file)
+    os.utime(prices_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    reloaded = worker.cache.get(prices_file, cross_file)
+    assert reloaded is not dataset
+    assert reloaded.num_prices == 4
+
+
+def test_serve(tmp_path):
+    prices_file, cross_file = write_price_files(tmp_path)
+    requests = [
+        {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+        {
+            "jsonrpc": "2.0",
+            "id": 2,
+            "method": "calculate_metrics",
+            "params": {"prices_file": prices_file, "cross_elasticity_file": cross_file},
+        },
+        {"jsonrpc": "2.0", "method": "ping"},
+    ]
+    stdin = io.StringIO("".join(json.dumps(r) + "\n\n" for r in requests))
+    stdout = io.StringIO()
+
+    ComputeWorker().serve(stdin, stdout)
+
+    responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [response["id"] for response in responses] == [1, 2]
+    assert responses[1]["result"]["metrics"]["num_productos"] == 2
@@ -1,7 +1,30 @@
+import importlib
+
 from .read_price_data import read_price_data
-from .build_qubo_matrix import build_qubo_matrix
-from .solve_qubo_model import solve_qubo_model
+from .build_qubo_matrix import build_qubo_matrix, build_qubo_arrays, qubo_arrays_to_dict
+from .build_qubo_matrix import domain_wall_variables, domain_wall_to_one_hot
+from .solve_qubo_model import solve_qubo_model, solve_qubo_arrays, register_solver
+from .gray_code_solver import solve_one_hot_qubo
+
+from .qubo import validate_qubo_size, validate_qubo_arrays_size, qubo_size_limits
 
-from .qubo import validate_qubo_size
+from .margin_evaluator import MarginEvaluator, local_search
+from .postprocess import polish_samples, best_polished_prices, sampleset_to_array
+from .scoring import MarginScorer
 
 from .validations import check_expected_products_list, check_price_selection_constraints
+from .validations import check_domain_wall_constraints, decode_domain_wall_sample
+
+# Names imported on first access (PEP 562), which keeps pandas out of the
+# scripts that do not read the columnar dataset
+_LAZY_ATTRIBUTES = {
+    "PriceDataset": ".price_dataset",
+    "load_price_dataset": ".price_dataset",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
@@ -1,8 +1,76 @@
-from collections import defaultdict
+import inspect
+from collections import defaultdict, namedtuple
 
+import numpy as np
+from scipy import sparse
 
-# Build QUBO matrix
-def build_qubo_matrix(
+# Dense integer index of the QUBO variables, one per (product, price) pair.
+# Variables are sorted by product, so the prices of the product at row r of
+# product_ids are the contiguous variables starts[r] .. starts[r] + counts[r].
+VariableIndex = namedtuple(
+    "VariableIndex",
+    ["variables", "positions", "product_ids", "starts", "counts", "codes"],
+)
+
+# QUBO terms in coordinate (COO) form over the dense variable indices
+QuboArrays = namedtuple(
+    "QuboArrays", ["variables", "linear", "rows", "cols", "values", "offset"]
+)
+
+
+# Map each (product, price) pair to a dense integer index
+def build_variable_index(product_prices):
+    variables = sorted(product_prices)
+    positions = {var: k for k, var in enumerate(variables)}
+
+    pairs = np.array(variables, dtype=np.int64).reshape(-1, 2)
+    product_ids, starts, counts = np.unique(
+        pairs[:, 0], return_index=True, return_counts=True
+    )
+
+    return VariableIndex(
+        variables, positions, product_ids, starts, counts, _pair_codes(pairs)
+    )
+
+
+# Encode (product, price) pairs as sortable integers
+def _pair_codes(pairs):
+    return (pairs[:, 0] << 32) | (pairs[:, 1] & 0xFFFFFFFF)
+
+
+# Find the index rows of the given products, -1 if a product has no prices
+def locate_products(variable_index, products):
+    product_ids = variable_index.product_ids
+    if len(product_ids) == 0:
+        return np.full(len(products), -1, dtype=np.int64)
+
+    rows = np.minimum(np.searchsorted(product_ids, products), len(product_ids) - 1)
+
+    return np.where(product_ids[rows] == products, rows, -1)
+
+
+# Find the variables of the given (product, price) pairs, -1 if missing
+def locate_variables(variable_index, products, prices):
+    codes = variable_index.codes
+    if len(codes) == 0:
+        return np.full(len(products), -1, dtype=np.int64)
+
+    query = _pair_codes(np.column_stack((products, prices)).astype(np.int64))
+    found = np.minimum(np.searchsorted(codes, query), len(codes) - 1)
+
+    return np.where(codes[found] == query, found, -1)
+
+
+# Concatenate the integer ranges start .. start + count
+def expand_ranges(starts, counts):
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+
+    return np.repeat(starts, counts) + np.arange(counts.sum()) - offsets
+
+
+# Build the QUBO terms as NumPy arrays. With the "one_hot" encoding there is a
+# variable per (product, price); with "domain_wall" see domain_wall_qubo.
+def build_qubo_arrays(
     product_prices,
     cross_product_prices,
     min_margins,
@@ -10,46 +78,261 @@ def build_qubo_matrix(
     lambda_price_uniqueness=5000,
     lambda_elasticity=1,
     lambda_force_price_product=1000,
+    encoding="one_hot",
 ):
-    Q = defaultdict(int)
+    if encoding not in ("one_hot", "domain_wall"):
+        raise ValueError(f"Encoding {encoding} is not supported")
 
-    product_ids = set(key[0] for key in product_prices.keys())
-    price_ids = set(key[1] for key in product_prices.keys())
+    variable_index = build_variable_index(product_prices)
+    variables = variable_index.variables
+    num_variables = len(variables)
+
+    margins = np.fromiter(
+        (product_prices[var] for var in variables), dtype=float, count=num_variables
+    )
+    variable_min_margins = np.fromiter(
+        (min_margins[i] for i, _ in variables), dtype=float, count=num_variables
+    )
 
     # Rule 1: Maximize margins
-    for (i, p), margin in product_prices.items():
-        var = f"i{i}_p{p}"
-        Q[(var, var)] -= lambda_maximize_margins * (margin - min_margins[i])
-
-    # Rule 2: Price uniqueness
-    for i in product_ids:
-        product_vars = [f"i{i}_p{p}" for p in price_ids if (i, p) in product_prices]
-
-        for var1 in product_vars:
-            for var2 in product_vars:
-                if var1 != var2:
-                    Q[(var1, var2)] += lambda_price_uniqueness
-
-    # Rule 3: Elasticity is introduced
-    for i1, i2, p in cross_product_prices:
-        if (i1, p) in product_prices:
-            margin_percentage = cross_product_prices[(i1, i2, p)]
-            for p2 in price_ids:
-                if (i2, p2) in product_prices:
-                    var1 = f"i{i1}_p{p}"
-                    var2 = f"i{i2}_p{p2}"
-                    Q[(var1, var2)] -= (
-                        lambda_elasticity
-                        * product_prices[(i2, p2)]
-                        * margin_percentage
-                        / 100
+    linear = -lambda_maximize_margins * (margins - variable_min_margins)
+
+    # Rules 2 and 4 keep one price per product, which the domain wall
+    # encoding does by construction
+    if encoding == "one_hot":
+        # Rule 4: Force each product to have a price
+        linear -= lambda_force_price_product
+
+        # Rule 2: Price uniqueness
+        rows, cols = price_pair_indices(variable_index.starts, variable_index.counts)
+        values = np.full(len(rows), 2 * lambda_price_uniqueness, dtype=float)
+    else:
+        rows = cols = np.empty(0, dtype=np.int64)
+        values = np.empty(0, dtype=float)
+
+    # Rule 3: Elasticity is introduced, only for the prices of the affected product
+    cross_keys = np.array(list(cross_product_prices), dtype=np.int64).reshape(-1, 3)
+    margin_percentages = np.fromiter(
+        cross_product_prices.values(), dtype=float, count=len(cross_keys)
+    )
+
+    source_vars = locate_variables(variable_index, cross_keys[:, 0], cross_keys[:, 2])
+    affected_rows = locate_products(variable_index, cross_keys[:, 1])
+    valid = (source_vars >= 0) & (affected_rows >= 0)
+    source_vars = source_vars[valid]
+    affected_rows = affected_rows[valid]
+    margin_percentages = margin_percentages[valid]
+
+    affected_counts = variable_index.counts[affected_rows]
+    elasticity_cols = expand_ranges(
+        variable_index.starts[affected_rows], affected_counts
+    )
+    elasticity_values = -(
+        lambda_elasticity
+        * margins[elasticity_cols]
+        * np.repeat(margin_percentages, affected_counts)
+        / 100
+    )
+
+    rows = np.concatenate((rows, np.repeat(source_vars, affected_counts)))
+    cols = np.concatenate((cols, elasticity_cols))
+    values = np.concatenate((values, elasticity_values))
+
+    # Terms on the diagonal are linear biases of a binary variable
+    diagonal = rows == cols
+    if diagonal.any():
+        np.add.at(linear, rows[diagonal], values[diagonal])
+        rows, cols, values = rows[~diagonal], cols[~diagonal], values[~diagonal]
+
+    qubo = QuboArrays(variables, linear, rows, cols, values, 0.0)
+    if encoding == "domain_wall":
+        return domain_wall_qubo(qubo, variable_index, lambda_price_uniqueness)
+
+    return qubo
+
+
+# One-hot variables of each product as a function of its domain wall
+# variables, x = T d + c. A product with k prices has k - 1 wall variables,
+# d_j = 1 meaning that the price is prices[j] or higher, so x_0 = 1 - d_1,
+# x_j = d_j - d_(j+1) and x_(k-1) = d_(k-1).
+def domain_wall_transform(variable_index):
+    starts, counts = variable_index.starts, variable_index.counts
+    num_variables = counts.sum()
+    walls = counts - 1
+    wall_starts = np.cumsum(walls) - walls
+
+    # Position of every one-hot variable among the prices of its product
+    positions = np.arange(num_variables) - np.repeat(starts, counts)
+    product_walls = np.repeat(wall_starts, counts)
+    product_counts = np.repeat(counts, counts)
+
+    lower = positions >= 1
+    upper = positions <= product_counts - 2
+    transform = sparse.coo_matrix(
+        (
+            np.concatenate((np.ones(lower.sum()), -np.ones(upper.sum()))),
+            (
+                np.concatenate((lower.nonzero()[0], upper.nonzero()[0])),
+                np.concatenate(
+                    (
+                        product_walls[lower] + positions[lower] - 1,
+                        product_walls[upper] + positions[upper],
                     )
+                ),
+            ),
+        ),
+        shape=(num_variables, walls.sum()),
+    ).tocsr()
+
+    return transform, (positions == 0).astype(float)
+
+
+# Domain wall variables, the (product, price) pairs of all the prices but the
+# lowest of each product
+def domain_wall_variables(variable_index):
+    first_prices = np.zeros(len(variable_index.variables), dtype=bool)
+    first_prices[variable_index.starts] = True
 
-    # Rule 4: Force each product to have a price
-    for i in product_ids:
-        product_vars = [f"i{i}_p{p}" for p in price_ids if (i, p) in product_prices]
+    return [
+        var
+        for var, first in zip(variable_index.variables, first_prices.tolist())
+        if not first
+    ]
 
-        for var1 in product_vars:
-            Q[(var1, var1)] -= lambda_force_price_product
+
+# Rewrite a one-hot QUBO objective over the domain wall variables, with
+# x = T d + c, and add the penalty lambda_wall * d_(j+1) * (1 - d_j) that keeps
+# the walls of each product valid
+def domain_wall_qubo(qubo, variable_index, lambda_wall):
+    transform, constant = domain_wall_transform(variable_index)
+    num_walls = transform.shape[1]
+    quadratic = sparse.coo_matrix(
+        (qubo.values, (qubo.rows, qubo.cols)),
+        shape=(len(qubo.linear), len(qubo.linear)),
+    ).tocsr()
+
+    linear = transform.T @ (qubo.linear + quadratic @ constant + quadratic.T @ constant)
+    offset = qubo.offset + qubo.linear @ constant + constant @ quadratic @ constant
+    wall_quadratic = (transform.T @ quadratic @ transform).tocoo()
+
+    # Chain penalty between consecutive walls of the same product
+    walls = variable_index.counts - 1
+    is_first_wall = np.zeros(num_walls, dtype=bool)
+    is_first_wall[(np.cumsum(walls) - walls)[walls > 0]] = True
+    chained = np.flatnonzero(~is_first_wall)
+    linear[chained] += lambda_wall
+
+    rows = np.concatenate((wall_quadratic.row, chained - 1))
+    cols = np.concatenate((wall_quadratic.col, chained))
+    values = np.concatenate((wall_quadratic.data, np.full(len(chained), -lambda_wall)))
+
+    diagonal = rows == cols
+    np.add.at(linear, rows[diagonal], values[diagonal])
+    rows, cols, values = rows[~diagonal], cols[~diagonal], values[~diagonal]
+
+    return QuboArrays(
+        domain_wall_variables(variable_index),
+        np.asarray(linear, dtype=float),
+        rows.astype(np.int64),
+        cols.astype(np.int64),
+        values,
+        float(offset),
+    )
+
+
+# Decode domain wall samples (one row per read) as one-hot samples over all
+# the prices. The price of each product is given by the first wall set to 0.
+def domain_wall_to_one_hot(samples, variable_index):
+    samples = np.atleast_2d(samples)
+    starts, counts = variable_index.starts, variable_index.counts
+    walls = counts - 1
+    wall_products = np.repeat(np.arange(len(counts)), walls)
+
+    # A wall is leading if it and all the previous walls of its product are 1
+    zeros = np.cumsum(samples == 0, axis=1)
+    zeros_before = np.zeros((len(samples), len(counts)), dtype=zeros.dtype)
+    wall_starts = np.cumsum(walls) - walls
+    has_walls = (walls > 0) & (wall_starts > 0)
+    zeros_before[:, has_walls] = zeros[:, wall_starts[has_walls] - 1]
+    leading = zeros == zeros_before[:, wall_products]
+
+    positions = np.zeros((len(samples), len(counts)), dtype=np.int64)
+    np.add.at(positions.T, wall_products, leading.T.astype(np.int64))
+
+    one_hot = np.zeros((len(samples), counts.sum()), dtype=np.int8)
+    np.put_along_axis(one_hot, starts + positions, 1, axis=1)
+
+    return one_hot
+
+
+# Upper-triangular pairs of price variables within each product. Products
+# with the same number of prices are emitted together as one batch.
+def price_pair_indices(starts, counts):
+    rows = [np.empty(0, dtype=np.int64)]
+    cols = [np.empty(0, dtype=np.int64)]
+
+    for count in np.unique(counts[counts > 1]).tolist():
+        upper_rows, upper_cols = np.triu_indices(count, k=1)
+        product_starts = starts[counts == count][:, None]
+        rows.append((product_starts + upper_rows).ravel())
+        cols.append((product_starts + upper_cols).ravel())
+
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+# Label of the QUBO variable for a product and price
+def variable_label(product, price):
+    return f"i{product}_p{price}"
+
+
+# Convert QUBO arrays to the string-keyed dictionary accepted by dimod
+def qubo_arrays_to_dict(qubo):
+    Q = defaultdict(int)
+    labels = [variable_label(i, p) for i, p in qubo.variables]
+
+    for label, bias in zip(labels, qubo.linear.tolist()):
+        Q[(label, label)] += bias
+
+    for row, col, value in zip(
+        qubo.rows.tolist(), qubo.cols.tolist(), qubo.values.tolist()
+    ):
+        Q[(labels[row], labels[col])] += value
 
     return Q
+
+
+# Build QUBO matrix
+def build_qubo_matrix(
+    product_prices,
+    cross_product_prices,
+    min_margins,
+    lambda_maximize_margins=1,
+    lambda_price_uniqueness=5000,
+    lambda_elasticity=1,
+    lambda_force_price_product=1000,
+    encoding="one_hot",
+):
+    qubo = build_qubo_arrays(
+        product_prices,
+        cross_product_prices,
+        min_margins,
+        lambda_maximize_margins=lambda_maximize_margins,
+        lambda_price_uniqueness=lambda_price_uniqueness,
+        lambda_elasticity=lambda_elasticity,
+        lambda_force_price_product=lambda_force_price_product,
+        encoding=encoding,
+    )
+
+    return qubo_arrays_to_dict(qubo)
+
+
+# Lambda weights of the QUBO, the defaults of build_qubo_arrays for those not
+# given
+def qubo_lambdas(**lambdas):
+    defaults = {
+        name: parameter.default
+        for name, parameter in inspect.signature(build_qubo_arrays).parameters.items()
+        if name.startswith("lambda_")
+    }
+
+    return {**defaults, **lambdas}
@@ -0,0 +1,196 @@
+import heapq
+from itertools import product
+from math import prod
+from multiprocessing import Pool
+
+import numpy as np
+from scipy import sparse
+
+
+# One-hot QUBO split into the products enumerated in Gray code order (outer)
+# and the products whose combinations are evaluated as a block (inner)
+class OneHotQubo:
+    def __init__(self, linear, rows, cols, values, offset, groups, block_size):
+        num_variables = len(linear)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=float)
+
+        # Diagonal terms are linear, the rest is kept as a symmetric matrix
+        self.linear = np.asarray(linear, dtype=float).copy()
+        diagonal = rows == cols
+        np.add.at(self.linear, rows[diagonal], values[diagonal])
+        upper = sparse.coo_matrix(
+            (values[~diagonal], (rows[~diagonal], cols[~diagonal])),
+            shape=(num_variables, num_variables),
+        )
+        self.couplings = (upper + upper.T).tocsr()
+        self.offset = offset
+
+        # Variables of every group, the groups with a single variable are fixed
+        _, group_ids = np.unique(np.asarray(groups), return_inverse=True)
+        order = np.argsort(group_ids, kind="stable")
+        self.groups = np.split(order, np.cumsum(np.bincount(group_ids))[:-1])
+        self.fixed = [members[0] for members in self.groups if len(members) == 1]
+        free = sorted((members for members in self.groups if len(members) > 1), key=len)
+
+        # The smallest groups are enumerated as a block of combinations
+        num_inner = 0
+        block = 1
+        while num_inner < len(free) and block * len(free[num_inner]) <= block_size:
+            block *= len(free[num_inner])
+            num_inner += 1
+        self.inner = free[:num_inner]
+        self.outer = free[num_inner:][::-1]
+
+        # Variables chosen by every combination of the inner groups and the
+        # part of the energy that only depends on them
+        self.combinations = np.array(
+            list(product(*self.inner)), dtype=np.int64
+        ).reshape(block, num_inner)
+        self.block_energies = self.linear[self.combinations].sum(axis=1)
+        for j in range(num_inner):
+            for k in range(j + 1, num_inner):
+                self.block_energies += np.asarray(
+                    self.couplings[self.combinations[:, j], self.combinations[:, k]]
+                ).ravel()
+
+    @property
+    def num_states(self):
+        return prod(len(members) for members in self.outer) * len(self.combinations)
+
+
+# Best num_reads states as a list of (-energy, tiebreak, outer variables,
+# combination), kept in a heap with the worst state on top
+def _push_best(best, num_reads, energies, outer_variables, counter):
+    if len(best) == num_reads:
+        candidates = np.flatnonzero(energies < -best[0][0])
+    else:
+        candidates = np.arange(len(energies))
+    if len(candidates) > num_reads:
+        candidates = candidates[
+            np.argpartition(energies[candidates], num_reads - 1)[:num_reads]
+        ]
+
+    for combination in candidates.tolist():
+        state = (-energies[combination], next(counter), outer_variables, combination)
+        if len(best) < num_reads:
+            heapq.heappush(best, state)
+        elif state[0] > best[0][0]:
+            heapq.heapreplace(best, state)
+
+
+# Enumerate the states with the first outer groups set to the given variables,
+# walking the rest of the outer groups in reflected mixed-radix Gray code order
+# (Knuth's loopless algorithm), so that each step changes a single price and
+# the energy is updated in O(degree)
+def _enumerate_states(qubo, prefix, num_reads):
+    groups = qubo.outer[len(prefix) :]
+    radices = [len(members) for members in groups]
+    digits = [0] * len(groups)
+    chosen = list(prefix) + [members[0] for members in groups]
+
+    # Local field of every variable from the chosen outer and fixed variables
+    active = np.array(chosen + qubo.fixed, dtype=np.int64)
+    field = np.asarray(qubo.couplings[:, active].sum(axis=1)).ravel()
+    energy = (
+        qubo.offset
+        + qubo.linear[active].sum()
+        + qubo.couplings[active][:, active].sum() / 2
+    )
+
+    indptr = qubo.couplings.indptr
+    indices = qubo.couplings.indices
+    data = qubo.couplings.data
+    group_couplings = [
+        qubo.couplings[members][:, members].toarray().tolist() for members in groups
+    ]
+
+    best = []
+    counter = iter(range(1 << 62))
+    focus = list(range(len(groups) + 1))
+    directions = [1] * len(groups)
+    offset = len(prefix)
+
+    while True:
+        energies = energy + qubo.block_energies + field[qubo.combinations].sum(axis=1)
+        _push_best(best, num_reads, energies, tuple(chosen), counter)
+
+        j = focus[0]
+        focus[0] = 0
+        if j == len(groups):
+            break
+
+        old_digit = digits[j]
+        digits[j] += directions[j]
+        new_digit = digits[j]
+        if new_digit == 0 or new_digit == radices[j] - 1:
+            directions[j] = -directions[j]
+            focus[j] = focus[j + 1]
+            focus[j + 1] = j + 1
+
+        # Move the price of the group from the old to the new variable
+        old = groups[j][old_digit]
+        new = groups[j][new_digit]
+        chosen[offset + j] = new
+        energy += qubo.linear[new] - qubo.linear[old] + field[new] - field[old]
+        energy -= group_couplings[j][old_digit][new_digit]
+        field[indices[indptr[old] : indptr[old + 1]]] -= data[
+            indptr[old] : indptr[old + 1]
+        ]
+        field[indices[indptr[new] : indptr[new + 1]]] += data[
+            indptr[new] : indptr[new + 1]
+        ]
+
+    return [(-state[0], state[2], state[3]) for state in best]
+
+
+def _enumerate_task(args):
+    return _enumerate_states(*args)
+
+
+# Exact solver of a QUBO over the states with exactly one variable set per
+# group. The states are streamed and only the best num_reads are kept, and the
+# first groups can be fixed in each of several processes to split the search.
+def solve_one_hot_qubo(
+    linear,
+    rows,
+    cols,
+    values,
+    groups,
+    offset=0,
+    num_reads=10,
+    workers=1,
+    block_size=4096,
+    max_states=10**9,
+):
+    qubo = OneHotQubo(linear, rows, cols, values, offset, groups, block_size)
+    if qubo.num_states > max_states:
+        raise ValueError(
+            f"Too many states for the gray solver: {qubo.num_states} > {max_states}"
+        )
+
+    # Fix the first outer groups to get a few tasks per process
+    num_prefix = 0
+    num_tasks = 1
+    while workers > 1 and num_prefix < len(qubo.outer) and num_tasks < 4 * workers:
+        num_tasks *= len(qubo.outer[num_prefix])
+        num_prefix += 1
+    tasks = [(qubo, prefix, num_reads) for prefix in product(*qubo.outer[:num_prefix])]
+
+    if workers > 1 and len(tasks) > 1:
+        with Pool(processes=min(workers, len(tasks))) as pool:
+            results = pool.map(_enumerate_task, tasks)
+    else:
+        results = map(_enumerate_task, tasks)
+
+    best = sorted(
+        (state for result in results for state in result), key=lambda s: s[0]
+    )[:num_reads]
+
+    samples = np.zeros((len(best), len(linear)), dtype=np.int8)
+    for read, (energy, outer_variables, combination) in enumerate(best):
+        samples[read, list(outer_variables) + qubo.fixed] = 1
+        samples[read, qubo.combinations[combination]] = 1
+
+    return samples, np.array([energy for energy, _, _ in best])
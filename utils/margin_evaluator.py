@@ -0,0 +1,139 @@
+from collections import defaultdict
+
+
+# Incremental evaluation of the margin of a price assignment. Elasticities are
+# indexed by product, so changing the price of one product costs O(degree).
+class MarginEvaluator:
+    def __init__(
+        self, product_prices, cross_product_prices, solution, lambda_force_price=500
+    ):
+        self.product_prices = product_prices
+        self.lambda_force_price = lambda_force_price
+        self.solution = dict(solution)
+
+        # Elasticities triggered by each (product_A, price_A) and received by
+        # each product_B
+        self.out_elasticities = defaultdict(list)
+        self.in_elasticities = defaultdict(list)
+        for (product_A, product_B, price_A), impact in cross_product_prices.items():
+            self.out_elasticities[(product_A, price_A)].append(
+                (product_B, impact / 100)
+            )
+            self.in_elasticities[product_B].append((product_A, price_A, impact / 100))
+
+        self.num_missing = sum(price is None for price in self.solution.values())
+        self.margin = self._full_margin()
+        self._undo_log = []
+
+    def _price_margin(self, product, price):
+        return self.product_prices.get((product, price), 0)
+
+    def _full_margin(self):
+        total_margin = sum(
+            self._price_margin(product, price)
+            for product, price in self.solution.items()
+        )
+
+        if self.num_missing > 0:
+            total_margin -= self.lambda_force_price
+
+        for product_A, price_A in self.solution.items():
+            for product_B, weight in self.out_elasticities.get(
+                (product_A, price_A), []
+            ):
+                if product_B in self.solution:
+                    total_margin += (
+                        self._price_margin(product_B, self.solution[product_B]) * weight
+                    )
+
+        return total_margin
+
+    # Margin change of setting a new price for a product of the solution
+    def delta(self, product, price):
+        old_price = self.solution[product]
+        if price == old_price:
+            return 0
+
+        old_margin = self._price_margin(product, old_price)
+        new_margin = self._price_margin(product, price)
+        delta = new_margin - old_margin
+
+        # Penalty for products without price
+        num_missing = self.num_missing + (price is None) - (old_price is None)
+        if self.num_missing > 0 and num_missing == 0:
+            delta += self.lambda_force_price
+        elif self.num_missing == 0 and num_missing > 0:
+            delta -= self.lambda_force_price
+
+        # Elasticities from the product to the rest of the solution
+        for product_B, weight in self.out_elasticities.get((product, old_price), []):
+            if product_B == product:
+                delta -= old_margin * weight
+            elif product_B in self.solution:
+                delta -= (
+                    self._price_margin(product_B, self.solution[product_B]) * weight
+                )
+        for product_B, weight in self.out_elasticities.get((product, price), []):
+            if product_B == product:
+                delta += new_margin * weight
+            elif product_B in self.solution:
+                delta += (
+                    self._price_margin(product_B, self.solution[product_B]) * weight
+                )
+
+        # Elasticities from the rest of the solution to the product
+        for product_A, price_A, weight in self.in_elasticities.get(product, []):
+            if product_A != product and self.solution.get(product_A) == price_A:
+                delta += (new_margin - old_margin) * weight
+
+        return delta
+
+    # Set a new price for a product, returning the margin change
+    def move(self, product, price):
+        delta = self.delta(product, price)
+        old_price = self.solution[product]
+
+        self._undo_log.append((product, old_price, delta))
+        self.solution[product] = price
+        self.num_missing += (price is None) - (old_price is None)
+        self.margin += delta
+
+        return delta
+
+    # Keep the moves made since the last commit
+    def commit(self):
+        self._undo_log = []
+
+    # Undo the moves made since the last commit
+    def rollback(self):
+        while self._undo_log:
+            product, old_price, delta = self._undo_log.pop()
+            price = self.solution[product]
+            self.solution[product] = old_price
+            self.num_missing += (old_price is None) - (price is None)
+            self.margin -= delta
+
+
+# Steepest-ascent local search: move the product whose best price change
+# improves the margin the most, until no single price change helps
+def local_search(evaluator, domains, max_moves=None):
+    num_moves = 0
+
+    while max_moves is None or num_moves < max_moves:
+        best_delta, best_move = 1e-9, None
+
+        for product, domain in domains.items():
+            for price in domain:
+                delta = evaluator.delta(product, price)
+                if delta > best_delta:
+                    best_delta, best_move = delta, (product, price)
+
+        if best_move is None:
+            break
+
+        evaluator.move(*best_move)
+        num_moves += 1
+
+    evaluator.commit()
+
+    return evaluator.solution, evaluator.margin
@@ -0,0 +1,89 @@
+import numpy as np
+
+from .build_qubo_matrix import build_variable_index
+from .scoring import build_margin_model, choices_margins
+
+
+# Convert the samples of a SampleSet to a 0/1 array whose columns follow labels
+def sampleset_to_array(sampleset, labels):
+    columns = {label: k for k, label in enumerate(sampleset.variables)}
+    order = [columns[label] for label in labels]
+
+    return np.asarray(sampleset.record.sample)[:, order]
+
+
+# Choose one price per product and sample: the best-margin price among the
+# selected ones, or among all the prices of the product if none is selected
+def repair_samples(samples, variable_index, margins):
+    starts, counts = variable_index.starts, variable_index.counts
+    var_products = np.repeat(np.arange(len(counts)), counts)
+
+    selected = samples.astype(bool)
+    any_selected = np.logical_or.reduceat(selected, starts, axis=1)
+    candidates = selected | ~any_selected[:, var_products]
+
+    # Rank each variable within its product and keep the best candidate
+    scores = np.where(candidates, margins, -np.inf)
+    best = np.maximum.reduceat(scores, starts, axis=1)
+    is_best = scores == best[:, var_products]
+    positions = np.where(is_best, np.arange(len(margins)), len(margins))
+
+    return np.minimum.reduceat(positions, starts, axis=1)
+
+
+# Repair the one-hot constraints of all the samples and polish them with
+# steepest-ascent price changes on the real margin objective
+def polish_samples(
+    samples, product_prices, cross_product_prices, max_iterations=100, tolerance=1e-9
+):
+    samples = np.atleast_2d(samples)
+    if not product_prices:
+        return np.empty((len(samples), 0), dtype=np.int64), np.zeros(len(samples))
+
+    variable_index = build_variable_index(product_prices)
+    margins, unary, var_products, elasticities = build_margin_model(
+        variable_index, product_prices, cross_product_prices
+    )
+
+    choices = repair_samples(samples, variable_index, margins)
+    reads = np.arange(choices.shape[0])
+
+    for _ in range(max_iterations):
+        chosen = np.zeros((choices.shape[0], len(margins)))
+        np.put_along_axis(chosen, choices, 1, axis=1)
+        chosen_margins = margins[choices]
+
+        # Elasticities received by each product and triggered by each variable
+        received = np.asarray((elasticities.T @ chosen.T).T)
+        triggered = np.asarray((elasticities @ chosen_margins.T).T)
+
+        current = choices[:, var_products]
+        deltas = (
+            unary
+            - unary[current]
+            + triggered
+            - np.take_along_axis(triggered, current, axis=1)
+            + (margins - margins[current]) * received[:, var_products]
+        )
+
+        best_vars = np.argmax(deltas, axis=1)
+        improving = deltas[reads, best_vars] > tolerance
+        if not improving.any():
+            break
+
+        choices[improving, var_products[best_vars[improving]]] = best_vars[improving]
+
+    return choices, choices_margins(choices, margins, unary, elasticities)
+
+
+# Prices of the best polished sample as {product: price}
+def best_polished_prices(samples, product_prices, cross_product_prices, **kwargs):
+    choices, sample_margins = polish_samples(
+        samples, product_prices, cross_product_prices, **kwargs
+    )
+    variables = sorted(product_prices)
+    best = int(np.argmax(sample_margins))
+
+    prices = dict(variables[var] for var in choices[best].tolist())
+
+    return prices, float(sample_margins[best])
@@ -0,0 +1,113 @@
+import numpy as np
+from scipy import sparse
+
+from .build_qubo_matrix import build_qubo_arrays, build_variable_index
+
+
+# Prices that are worse than another price of the same product whatever the
+# prices of the rest of the products. The energy of a price is bounded with
+# the lowest and highest coupling with the prices of every neighbour product,
+# and a price is dominated if its lower bound is above the upper bound of
+# another price of its product.
+def dominated_prices(qubo, variable_index, tolerance=1e-9):
+    counts = variable_index.counts
+    num_variables = len(qubo.linear)
+    variable_products = np.repeat(np.arange(len(counts)), counts)
+
+    # Couplings between prices of different products, in both directions
+    cross = variable_products[qubo.rows] != variable_products[qubo.cols]
+    upper = sparse.coo_matrix(
+        (qubo.values[cross], (qubo.rows[cross], qubo.cols[cross])),
+        shape=(num_variables, num_variables),
+    )
+    couplings = (upper + upper.T).tocsr().tocoo()
+
+    lower_bounds = np.asarray(qubo.linear, dtype=float).copy()
+    upper_bounds = lower_bounds.copy()
+    if couplings.nnz:
+        variables = couplings.row
+        neighbours = variable_products[couplings.col]
+        order = np.lexsort((neighbours, variables))
+        variables = variables[order]
+        neighbours = neighbours[order]
+        values = couplings.data[order]
+
+        # Range of the couplings of every price with each neighbour product,
+        # the prices of the neighbour without coupling count as 0
+        is_first = np.ones(len(values), dtype=bool)
+        is_first[1:] = (variables[1:] != variables[:-1]) | (
+            neighbours[1:] != neighbours[:-1]
+        )
+        starts = np.flatnonzero(is_first)
+        highest = np.maximum.reduceat(values, starts)
+        lowest = np.minimum.reduceat(values, starts)
+        partial = np.diff(np.append(starts, len(values))) < counts[neighbours[starts]]
+        highest[partial] = np.maximum(highest[partial], 0)
+        lowest[partial] = np.minimum(lowest[partial], 0)
+
+        np.add.at(upper_bounds, variables[starts], highest)
+        np.add.at(lower_bounds, variables[starts], lowest)
+
+    best_upper_bounds = np.minimum.reduceat(upper_bounds, variable_index.starts)
+
+    return lower_bounds > np.repeat(best_upper_bounds, counts) + tolerance
+
+
+# Remove the dominated prices of the products, and the elasticities they
+# trigger, until no price is dominated. Returns the reduced price data and the
+# number of prices removed.
+def remove_dominated_prices(
+    product_prices,
+    cross_product_prices,
+    min_margins,
+    lambda_maximize_margins=1,
+    lambda_elasticity=1,
+    max_rounds=10,
+):
+    num_removed = 0
+
+    for _ in range(max_rounds):
+        if not product_prices:
+            break
+
+        # Objective of the prices, without the one price per product penalties
+        qubo = build_qubo_arrays(
+            product_prices,
+            cross_product_prices,
+            min_margins,
+            lambda_maximize_margins=lambda_maximize_margins,
+            lambda_price_uniqueness=0,
+            lambda_elasticity=lambda_elasticity,
+            lambda_force_price_product=0,
+        )
+        dominated = dominated_prices(qubo, build_variable_index(product_prices))
+        if not dominated.any():
+            break
+
+        removed = {
+            var for var, is_dominated in zip(qubo.variables, dominated) if is_dominated
+        }
+        product_prices = {
+            var: margin for var, margin in product_prices.items() if var not in removed
+        }
+        cross_product_prices = {
+            key: impact
+            for key, impact in cross_product_prices.items()
+            if (key[0], key[2]) not in removed
+        }
+        num_removed += len(removed)
+
+    return product_prices, cross_product_prices, num_removed
+
+
+# Fix the variables of a BQM that take the same value in all its minimizing
+# states (strong persistency of roof duality). Returns the reduced BQM and the
+# fixed variables.
+def fix_bqm_variables(bqm):
+    from dwave.preprocessing import roof_duality
+
+    _, fixed = roof_duality(bqm, strict=True)
+    reduced = bqm.copy()
+    reduced.fix_variables(fixed)
+
+    return reduced, fixed
@@ -0,0 +1,174 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = {"product": np.int32, "price": np.int32, "margin_of_sales": np.float64}
+ELASTICITY_COLUMNS = {
+    "product_A": np.int32,
+    "affected_product_B": np.int32,
+    "price_A": np.int32,
+    "affected_margin_B": np.float32,
+}
+
+
+# Columnar, typed representation of the prices and cross elasticities. The
+# dictionaries returned by read_price_data are built lazily on first access.
+# The minimum margin of a product counts all the price rows read, also those
+# of a repeated key, given as row_products and row_margins.
+class PriceDataset:
+    def __init__(
+        self,
+        products,
+        prices,
+        margins,
+        product_A,
+        product_B,
+        price_A,
+        elasticities,
+        row_products=None,
+        row_margins=None,
+    ):
+        self.products = products
+        self.prices = prices
+        self.margins = margins
+        self.row_products = products if row_products is None else row_products
+        self.row_margins = margins if row_margins is None else row_margins
+        self.product_A = product_A
+        self.product_B = product_B
+        self.price_A = price_A
+        self.elasticities = elasticities
+
+    @property
+    def num_prices(self):
+        return len(self.products)
+
+    @property
+    def num_elasticities(self):
+        return len(self.product_A)
+
+    @cached_property
+    def product_prices(self):
+        return dict(
+            zip(
+                zip(self.products.tolist(), self.prices.tolist()),
+                self.margins.tolist(),
+            )
+        )
+
+    # Elasticities as float64. The shortest representation of a float32 is
+    # the decimal value read from the file, which is what the legacy
+    # dictionaries hold.
+    def decimal_elasticities(self):
+        return self.elasticities.astype(str).astype(float)
+
+    # Decimal value read from the file of a single float32 elasticity
+    @staticmethod
+    def decimal_value(elasticity):
+        return float(str(np.float32(elasticity)))
+
+    @cached_property
+    def cross_product_prices(self):
+        elasticities = self.decimal_elasticities()
+
+        return dict(
+            zip(
+                zip(
+                    self.product_A.tolist(),
+                    self.product_B.tolist(),
+                    self.price_A.tolist(),
+                ),
+                elasticities.tolist(),
+            )
+        )
+
+    @cached_property
+    def min_margins(self):
+        product_ids, inverse = np.unique(self.row_products, return_inverse=True)
+        min_margins = np.full(len(product_ids), np.inf)
+        np.minimum.at(min_margins, inverse, self.row_margins)
+
+        return dict(zip(product_ids.tolist(), min_margins.tolist()))
+
+    # Legacy (product_prices, cross_product_prices, min_margins) view
+    def as_dicts(self):
+        return self.product_prices, self.cross_product_prices, self.min_margins
+
+
+# Read a ';' separated CSV file in chunks into one typed array per column
+def read_columns(file, columns, chunk_size=1000000):
+    chunks = {name: [] for name in columns}
+
+    reader = pd.read_csv(
+        file,
+        sep=";",
+        header=None,
+        skiprows=1,
+        usecols=range(len(columns)),
+        names=list(columns),
+        dtype=columns,
+        chunksize=chunk_size,
+    )
+    for chunk in reader:
+        for name in columns:
+            chunks[name].append(chunk[name].to_numpy())
+
+    return [
+        (
+            np.concatenate(chunks[name])
+            if chunks[name]
+            else np.empty(0, dtype=columns[name])
+        )
+        for name in columns
+    ]
+
+
+# Positions of the last row of every distinct key, in file order. Repeated
+# keys keep their last value, as they do in the legacy dictionaries.
+def last_unique_rows(*keys):
+    order = np.lexsort(keys[::-1])
+    is_last = np.ones(len(order), dtype=bool)
+    if len(order) > 1:
+        same_as_next = np.ones(len(order) - 1, dtype=bool)
+        for key in keys:
+            sorted_key = key[order]
+            same_as_next &= sorted_key[:-1] == sorted_key[1:]
+        is_last[:-1] = ~same_as_next
+
+    return np.sort(order[is_last])
+
+
+# Load the price data from CSV files into a columnar dataset
+def load_price_dataset(prices_file, cross_elasticity_file, chunk_size=1000000):
+    row_products, row_prices, row_margins = read_columns(
+        prices_file, PRICE_COLUMNS, chunk_size
+    )
+    rows = last_unique_rows(row_products, row_prices)
+    if len(rows) < len(row_products):
+        products, prices, margins = (
+            row_products[rows],
+            row_prices[rows],
+            row_margins[rows],
+        )
+    else:
+        products, prices, margins = row_products, row_prices, row_margins
+
+    product_A, product_B, price_A, elasticities = read_columns(
+        cross_elasticity_file, ELASTICITY_COLUMNS, chunk_size
+    )
+    rows = last_unique_rows(product_A, product_B, price_A)
+    if len(rows) < len(product_A):
+        product_A, product_B = product_A[rows], product_B[rows]
+        price_A, elasticities = price_A[rows], elasticities[rows]
+
+    return PriceDataset(
+        products,
+        prices,
+        margins,
+        product_A,
+        product_B,
+        price_A,
+        elasticities,
+        row_products,
+        row_margins,
+    )
@@ -1,3 +1,27 @@
+import numpy as np
+
+# Maximum number of variables and connections of a QUBO for each solver. The
+# exact solver enumerates all the 2^n states, which takes seconds with 20
+# variables. The gray solver only enumerates one price per product, at most
+# 3^16 states with 48 variables.
+QUBO_BUDGETS = {
+    "exact": (20, 400),
+    "gray": (48, 2304),
+    "quantum": (175, 30625),
+    "hybrid": (175, 30625),
+    "simulated": (1000, 1000000),
+    "tabu": (1000, 1000000),
+}
+
+
+# Maximum number of variables and connections of a QUBO for a solver
+def qubo_size_limits(solver_type):
+    if solver_type not in QUBO_BUDGETS:
+        raise ValueError(f"Solver {solver_type} is not supported")
+
+    return QUBO_BUDGETS[solver_type]
+
+
 # Validates the size of the QUBO matrix before sending it to the quantum solver.
 def validate_qubo_size(Q, max_variables, max_connections):
     num_variables = len({var for interaction in Q for var in interaction})
@@ -10,3 +34,21 @@ def validate_qubo_size(Q, max_variables, max_connections):
         return False
 
     return True
+
+
+# Validates the size of a QUBO built as arrays, counting every variable and
+# every distinct pair of coupled variables as a connection.
+def validate_qubo_arrays_size(qubo, max_variables, max_connections):
+    num_variables = len(qubo.linear)
+    pairs = np.minimum(qubo.rows, qubo.cols) * num_variables + np.maximum(
+        qubo.rows, qubo.cols
+    )
+    num_connections = num_variables + len(np.unique(pairs))
+
+    if num_variables > max_variables:
+        return False
+
+    if num_connections > max_connections:
+        return False
+
+    return True
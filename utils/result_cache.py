@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+import tempfile
+import zipfile
+
+import numpy as np
+
+
+# Key of the content of some files and of JSON serializable parameters
+def content_key(files, params):
+    digest = hashlib.sha256()
+    for file in files:
+        file_digest = hashlib.sha256()
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                file_digest.update(block)
+        digest.update(file_digest.digest())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+
+    return digest.hexdigest()
+
+
+# On-disk cache of NumPy arrays by key, one compressed .npz file per entry.
+# Reading an entry marks it as recently used, and the least recently used
+# entries are removed while the cache takes more than max_bytes.
+class ResultCache:
+    def __init__(self, directory, max_bytes=256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    # Arrays of an entry, None if it is not cached (or cannot be read)
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+        except (OSError, ValueError, zipfile.BadZipFile):
+            return None
+
+        # Another process may have evicted the entry after it was read
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return arrays
+
+    # Store the arrays of an entry. The file is written aside and renamed, so
+    # processes sharing the cache never read a partial entry.
+    def put(self, key, **arrays):
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(temporary_path, self._path(key))
+        finally:
+            # Left behind only if the entry could not be written
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+
+        self.evict()
+
+    # Remove the least recently used entries while the cache is too large.
+    # Other processes may be removing entries at the same time.
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
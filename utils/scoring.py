@@ -0,0 +1,152 @@
+import numpy as np
+from scipy import sparse
+
+from .build_qubo_matrix import build_variable_index, locate_products, locate_variables
+
+
+# Margin model of the price variables: margin of every price variable and the
+# elasticities as a sparse (source variable x affected product) matrix
+def build_margin_model(variable_index, product_prices, cross_product_prices):
+    margins = np.array(
+        [product_prices[var] for var in variable_index.variables], dtype=float
+    )
+    var_products = np.repeat(
+        np.arange(len(variable_index.counts)), variable_index.counts
+    )
+
+    cross_keys = np.array(list(cross_product_prices), dtype=np.int64).reshape(-1, 3)
+    weights = (
+        np.fromiter(cross_product_prices.values(), dtype=float, count=len(cross_keys))
+        / 100
+    )
+    source_vars = locate_variables(variable_index, cross_keys[:, 0], cross_keys[:, 2])
+    affected_products = locate_products(variable_index, cross_keys[:, 1])
+    valid = (source_vars >= 0) & (affected_products >= 0)
+    source_vars = source_vars[valid]
+    affected_products = affected_products[valid]
+    weights = weights[valid]
+
+    # An elasticity of a product on itself only depends on its own price
+    own = var_products[source_vars] == affected_products
+    unary = margins.copy()
+    np.add.at(unary, source_vars[own], weights[own] * margins[source_vars[own]])
+
+    elasticities = sparse.csr_matrix(
+        (weights[~own], (source_vars[~own], affected_products[~own])),
+        shape=(len(margins), len(variable_index.counts)),
+    )
+
+    return margins, unary, var_products, elasticities
+
+
+# Margin of every sample given the chosen price variable of each product. The
+# elasticities received by the products of all the samples are a single
+# sparse product of the chosen variables and the elasticity matrix.
+def choices_margins(choices, margins, unary, elasticities):
+    num_samples, num_products = choices.shape
+    chosen = sparse.csr_matrix(
+        (
+            np.ones(choices.size),
+            (np.repeat(np.arange(num_samples), num_products), choices.ravel()),
+        ),
+        shape=(num_samples, len(margins)),
+    )
+    received = (chosen @ elasticities).multiply(margins[choices])
+
+    return unary[choices].sum(axis=1) + np.asarray(received.sum(axis=1)).ravel()
+
+
+# Margin of many candidate price assignments at once, with the objective of
+# calculate_margin_with_restriction. Candidates are matrices of choices with a
+# column per product (in the order of products): the variable of the price of
+# the product, -1 for no price (penalized), or outside for a product without
+# price in the candidate or a price without margin nor elasticities.
+class MarginScorer:
+    def __init__(self, product_prices, cross_product_prices, lambda_force_price=500):
+        self.lambda_force_price = lambda_force_price
+
+        # Prices without margin still trigger their elasticities, also from
+        # products without any margin
+        model_prices = {
+            (product_A, price_A): 0
+            for product_A, product_B, price_A in cross_product_prices
+        }
+        model_prices.update(product_prices)
+
+        self.variable_index = build_variable_index(model_prices)
+        self.products = self.variable_index.product_ids.tolist()
+        self.columns = {product: k for k, product in enumerate(self.products)}
+        margins, unary, _, elasticities = build_margin_model(
+            self.variable_index, model_prices, cross_product_prices
+        )
+
+        # The last variable stands for the prices outside the model
+        self.outside = len(margins)
+        self.margins = np.append(margins, 0)
+        self.unary = np.append(unary, 0)
+        self.elasticities = sparse.vstack(
+            [elasticities, sparse.csr_matrix((1, len(self.products)))], format="csr"
+        )
+
+    # Choices of a matrix of prices with a column per product, None for no price
+    def choices(self, prices):
+        prices = np.array(prices, ndmin=2)
+        if prices.dtype == object:
+            missing = np.equal(prices, None)
+        else:
+            missing = np.zeros(prices.shape, dtype=bool)
+
+        products = np.broadcast_to(self.variable_index.product_ids, prices.shape)
+        variables = locate_variables(
+            self.variable_index,
+            products[~missing],
+            prices[~missing].astype(np.int64),
+        )
+
+        choices = np.full(prices.shape, -1, dtype=np.int64)
+        choices[~missing] = np.where(variables >= 0, variables, self.outside)
+
+        return choices
+
+    # Margin of every candidate, without the penalty for products without price
+    def margins_of(self, choices):
+        choices = np.atleast_2d(choices)
+
+        return choices_margins(
+            np.where(choices < 0, self.outside, choices),
+            self.margins,
+            self.unary,
+            self.elasticities,
+        )
+
+    # Margin of every candidate
+    def score(self, choices):
+        choices = np.atleast_2d(choices)
+
+        missing = (choices < 0).any(axis=1)
+
+        return self.margins_of(choices) - self.lambda_force_price * missing
+
+    # Margin of every candidate given as a {product: price} dictionary. Only
+    # the products of a solution count, and a None price is penalized.
+    def score_solutions(self, solutions):
+        choices = np.full(
+            (len(solutions), len(self.products)), self.outside, dtype=np.int64
+        )
+        missing = np.zeros(len(solutions), dtype=bool)
+        for row, solution in enumerate(solutions):
+            missing[row] = None in solution.values()
+            priced = [
+                (product, price)
+                for product, price in solution.items()
+                if price is not None and product in self.columns
+            ]
+            if not priced:
+                continue
+
+            products, prices = np.array(priced, dtype=np.int64).T
+            variables = locate_variables(self.variable_index, products, prices)
+            columns = [self.columns[product] for product in products.tolist()]
+            choices[row, columns] = np.where(variables >= 0, variables, self.outside)
+
+        return self.margins_of(choices) - self.lambda_force_price * missing
@@ -1,24 +1,217 @@
-from dimod import BinaryQuadraticModel
-from dimod.reference.samplers import ExactSolver
-from dwave.system import LeapHybridSampler, DWaveSampler, EmbeddingComposite
-from dimod import BinaryQuadraticModel
+from .gray_code_solver import solve_one_hot_qubo
+from .presolve import fix_bqm_variables
 
+# Function that samples a BQM for every solver type. The solver backends, and
+# dimod itself, are imported the first time they are used.
+SOLVERS = {}
 
-# Solve the QUBO model using the specified solver
-def solve_qubo_model(Q, offset=0, token=None, solver_type="exact", num_reads=10):
 
-    bqm = BinaryQuadraticModel.from_qubo(Q, offset=offset)
+# Register a function sample(bqm, token, num_reads, num_sweeps, seed, groups,
+# workers) as the sampler of a solver type
+def register_solver(solver_type):
+    def register(sample):
+        SOLVERS[solver_type] = sample
+        return sample
+
+    return register
+
+
+@register_solver("exact")
+def _sample_exact(
+    bqm, token=None, num_reads=10, num_sweeps=1000, seed=None, groups=None, workers=1
+):
+    from dimod.reference.samplers import ExactSolver
+
+    return ExactSolver().sample(bqm)
+
+
+@register_solver("hybrid")
+def _sample_hybrid(
+    bqm, token=None, num_reads=10, num_sweeps=1000, seed=None, groups=None, workers=1
+):
+    from dwave.system import LeapHybridSampler
+
+    return LeapHybridSampler(token=token).sample(bqm)
+
+
+@register_solver("quantum")
+def _sample_quantum(
+    bqm, token=None, num_reads=10, num_sweeps=1000, seed=None, groups=None, workers=1
+):
+    from dwave.system import DWaveSampler, EmbeddingComposite
+
+    solver = EmbeddingComposite(DWaveSampler(token=token))
+    return solver.sample(bqm, num_reads=num_reads, auto_scale=True)
+
+
+@register_solver("simulated")
+def _sample_simulated(
+    bqm, token=None, num_reads=10, num_sweeps=1000, seed=None, groups=None, workers=1
+):
+    from dwave.samplers import SimulatedAnnealingSampler
+
+    solver = SimulatedAnnealingSampler()
+    return solver.sample(bqm, num_reads=num_reads, num_sweeps=num_sweeps, seed=seed)
+
+
+@register_solver("tabu")
+def _sample_tabu(
+    bqm, token=None, num_reads=10, num_sweeps=1000, seed=None, groups=None, workers=1
+):
+    from dwave.samplers import TabuSampler
+
+    return TabuSampler().sample(bqm, num_reads=num_reads, seed=seed)
+
+
+# Exact solver over the states with one variable set per group (the prices of
+# each product), keeping the num_reads best states. groups follows the order
+# of the variables of the BQM.
+@register_solver("gray")
+def _sample_gray(
+    bqm, token=None, num_reads=10, num_sweeps=1000, seed=None, groups=None, workers=1
+):
+    from dimod import SampleSet
+
+    if groups is None:
+        raise ValueError("Solver gray needs the group of every variable")
+
+    linear, (rows, cols, values), offset = bqm.to_numpy_vectors()
+    samples, energies = solve_one_hot_qubo(
+        linear,
+        rows,
+        cols,
+        values,
+        groups,
+        offset=offset,
+        num_reads=num_reads,
+        workers=workers,
+    )
 
-    if solver_type == "exact":
-        solver = ExactSolver()
-        result = solver.sample(bqm)
-    elif solver_type == "hybrid":
-        solver = LeapHybridSampler(token=token)
-        result = solver.sample(bqm)
-    elif solver_type == "quantum":
-        solver = EmbeddingComposite(DWaveSampler(token=token))
-        result = solver.sample(bqm, num_reads=num_reads, auto_scale=True)
-    else:
+    return SampleSet.from_samples((samples, list(bqm.variables)), "BINARY", energies)
+
+
+# Sample a binary quadratic model using the specified solver
+def sample_bqm(
+    bqm,
+    token=None,
+    solver_type="exact",
+    num_reads=10,
+    num_sweeps=1000,
+    seed=None,
+    groups=None,
+    workers=1,
+):
+    from dimod import SampleSet
+
+    if solver_type not in SOLVERS:
         raise ValueError(f"Solver {solver_type} is not supported")
 
+    # The samplers do not agree on a BQM without variables, which has one state
+    if bqm.num_variables == 0:
+        return SampleSet.from_samples_bqm(([[]], []), bqm)
+
+    return SOLVERS[solver_type](
+        bqm,
+        token=token,
+        num_reads=num_reads,
+        num_sweeps=num_sweeps,
+        seed=seed,
+        groups=groups,
+        workers=workers,
+    )
+
+
+# Sample the BQM left after fixing the variables given by roof duality, and
+# add the fixed variables back to the samples. The number of fixed variables
+# is kept in the info of the SampleSet.
+def sample_presolved_bqm(bqm, **kwargs):
+    from dimod import append_variables
+
+    reduced, fixed = fix_bqm_variables(bqm)
+    result = append_variables(sample_bqm(reduced, **kwargs), fixed)
+    result.info["num_fixed_variables"] = len(fixed)
+
     return result
+
+
+# Sample a BQM, fixing variables by roof duality first with presolve. The gray
+# solver keeps one variable per group, which fixed variables would break, so
+# it always samples the whole BQM.
+def _sample(bqm, solver_type, presolve, **kwargs):
+    if presolve and solver_type != "gray":
+        return sample_presolved_bqm(bqm, solver_type=solver_type, **kwargs)
+
+    return sample_bqm(bqm, solver_type=solver_type, **kwargs)
+
+
+# Solve the QUBO model using the specified solver. The gray solver needs the
+# group of every variable as a {variable: group} mapping, and the rest of the
+# solvers can fix variables by roof duality first with presolve.
+def solve_qubo_model(
+    Q,
+    offset=0,
+    token=None,
+    solver_type="exact",
+    num_reads=10,
+    num_sweeps=1000,
+    seed=None,
+    groups=None,
+    workers=1,
+    presolve=False,
+):
+    from dimod import BinaryQuadraticModel
+
+    bqm = BinaryQuadraticModel.from_qubo(Q, offset=offset)
+    if groups is not None:
+        groups = [groups[label] for label in bqm.variables]
+
+    return _sample(
+        bqm,
+        solver_type,
+        presolve,
+        token=token,
+        num_reads=num_reads,
+        num_sweeps=num_sweeps,
+        seed=seed,
+        groups=groups,
+        workers=workers,
+    )
+
+
+# Solve the QUBO model given as a linear vector and quadratic COO arrays.
+# Variables are labelled 0..n-1 unless labels are given, the gray solver
+# needs the group of every variable, and the rest of the solvers can fix
+# variables by roof duality first with presolve.
+def solve_qubo_arrays(
+    linear,
+    rows,
+    cols,
+    values,
+    offset=0,
+    token=None,
+    solver_type="exact",
+    num_reads=10,
+    num_sweeps=1000,
+    seed=None,
+    labels=None,
+    groups=None,
+    workers=1,
+    presolve=False,
+):
+    from dimod import BinaryQuadraticModel
+
+    bqm = BinaryQuadraticModel.from_numpy_vectors(
+        linear, (rows, cols, values), offset, "BINARY", variable_order=labels
+    )
+
+    return _sample(
+        bqm,
+        solver_type,
+        presolve,
+        token=token,
+        num_reads=num_reads,
+        num_sweeps=num_sweeps,
+        seed=seed,
+        groups=groups,
+        workers=workers,
+    )
@@ -1,3 +1,6 @@
+from .build_qubo_matrix import variable_label
+
+
 # Check if all the expected products are present in the solution
 def check_expected_products_list(sample, expected_products):
     present_products = {
@@ -28,3 +31,49 @@ def check_price_selection_constraints(sample):
             invalid_products[product] = prices
 
     return len(invalid_products) == 0, invalid_products
+
+
+# Check that the walls of each product in a domain wall sample are a run of
+# 1s followed by 0s, in the order of the prices
+def check_domain_wall_constraints(sample):
+    product_to_walls = {}
+
+    for var, value in sample.items():
+        product, price = var.split("_")
+        product_id = int(product[1:])
+        price_id = int(price[1:])
+        product_to_walls.setdefault(product_id, []).append((price_id, value))
+
+    invalid_products = {}
+
+    for product, walls in product_to_walls.items():
+        values = [value for _, value in sorted(walls)]
+        if any(previous < value for previous, value in zip(values, values[1:])):
+            invalid_products[product] = values
+
+    return len(invalid_products) == 0, invalid_products
+
+
+# Decode a domain wall sample as a one-hot sample over all the prices. The
+# price of each product is the last one before its first wall set to 0.
+def decode_domain_wall_sample(sample, product_prices):
+    decoded = {}
+    previous_product = None
+
+    for product, price in sorted(product_prices):
+        label = variable_label(product, price)
+        if product != previous_product:
+            # The lowest price has no wall and is selected by default
+            previous_product = product
+            selected = label
+            on_wall = True
+            decoded[label] = 1
+        elif on_wall and sample.get(label, 0) == 1:
+            decoded[selected] = 0
+            decoded[label] = 1
+            selected = label
+        else:
+            on_wall = False
+            decoded[label] = 0
+
+    return decoded
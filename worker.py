@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import inspect
+import importlib
+import traceback
+from collections import OrderedDict
+from contextlib import redirect_stdout
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+# Entry points served as they are, as (module, function). The modules are
+# imported on the first call, so the worker starts without loading pandas,
+# dimod or the clustering backends.
+ENTRY_POINTS = {
+    "setup_project": ("setup_project", "create_project_folder"),
+    "read_cluster_data": ("get_cluster_data", "read_cluster_data"),
+    "solve_and_integrate": ("elastic_pricing_clustering", "solve_and_integrate"),
+    "read_results_data": ("get_results_data", "read_results_data"),
+    "calculate_result_metrics": (
+        "calculate_result_metrics",
+        "calculate_result_metrics",
+    ),
+}
+
+
+# Price datasets kept in memory between calls, the least recently used ones
+# are dropped. A dataset is read again when one of its files changes.
+class DatasetCache:
+    def __init__(self, max_datasets=4):
+        self.max_datasets = max_datasets
+        self.datasets = OrderedDict()
+
+    def get(self, prices_file, cross_elasticity_file):
+        key = tuple(
+            (os.path.abspath(file), os.stat(file).st_mtime_ns, os.stat(file).st_size)
+            for file in (prices_file, cross_elasticity_file)
+        )
+        if key in self.datasets:
+            self.datasets.move_to_end(key)
+        else:
+            from utils import load_price_dataset
+
+            self.datasets[key] = load_price_dataset(prices_file, cross_elasticity_file)
+            if len(self.datasets) > self.max_datasets:
+                self.datasets.popitem(last=False)
+
+        return self.datasets[key]
+
+
+# Long-lived compute worker answering line-delimited JSON-RPC 2.0 requests,
+# one per line on stdin, with one response per line on stdout
+class ComputeWorker:
+    def __init__(self, max_datasets=4):
+        self.cache = DatasetCache(max_datasets)
+        self.methods = {
+            "ping": lambda: {"status": "success"},
+            "calculate_metrics": self.calculate_metrics,
+            "run_clustering": self.run_clustering,
+            "get_margin_of_sales": self.get_margin_of_sales,
+        }
+
+    # Function of a method, None if there is no such method
+    def method(self, name):
+        if name not in self.methods and name in ENTRY_POINTS:
+            module, function = ENTRY_POINTS[name]
+            self.methods[name] = getattr(importlib.import_module(module), function)
+
+        return self.methods.get(name)
+
+    def calculate_metrics(self, prices_file, cross_elasticity_file):
+        from calculate_metrics import dataset_metrics
+
+        return dataset_metrics(self.cache.get(prices_file, cross_elasticity_file))
+
+    def run_clustering(
+        self,
+        method,
+        output_dir,
+        prices_file,
+        cross_elasticity_file,
+        seed=None,
+        **options,
+    ):
+        from clustering import run_clustering
+
+        dataset = self.cache.get(prices_file, cross_elasticity_file)
+        return run_clustering(
+            method,
+            output_dir,
+            prices_file,
+            cross_elasticity_file,
+            price_data=dataset.as_dicts(),
+            seed=seed,
+            **options,
+        )
+
+    def get_margin_of_sales(self, results_file, prices_file):
+        from get_margin_of_sales import calcular_margen_total
+
+        return float(calcular_margen_total(results_file, prices_file))
+
+    # Answer a single request, None for notifications (requests without id)
+    def handle(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return error_response(None, PARSE_ERROR, f"Parse error: {e}")
+
+        if not isinstance(request, dict) or "method" not in request:
+            return error_response(
+                request_id(request), INVALID_REQUEST, "Invalid request"
+            )
+
+        try:
+            method = self.method(request["method"])
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return error_response(request_id(request), SERVER_ERROR, str(e))
+
+        if method is None:
+            return error_response(
+                request_id(request),
+                METHOD_NOT_FOUND,
+                f"Method not found: {request['method']}",
+            )
+
+        params = request.get("params", [])
+        if not isinstance(params, (list, dict)):
+            return error_response(request_id(request), INVALID_PARAMS, "Invalid params")
+
+        try:
+            if isinstance(params, dict):
+                arguments = inspect.signature(method).bind(**params)
+            else:
+                arguments = inspect.signature(method).bind(*params)
+        except TypeError as e:
+            return error_response(request_id(request), INVALID_PARAMS, str(e))
+
+        try:
+            # The entry points must not write to the protocol stream
+            with redirect_stdout(sys.stderr):
+                result = method(*arguments.args, **arguments.kwargs)
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return error_response(request_id(request), SERVER_ERROR, str(e))
+
+        if "id" not in request:
+            return None
+
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+    def serve(self, stdin=sys.stdin, stdout=sys.stdout):
+        for line in stdin:
+            if not line.strip():
+                continue
+
+            response = self.handle(line)
+            if response is not None:
+                stdout.write(json.dumps(response) + "\n")
+                stdout.flush()
+
+
+def request_id(request):
+    return request.get("id") if isinstance(request, dict) else None
+
+
+def error_response(id, code, message):
+    return {"jsonrpc": "2.0", "id": id, "error": {"code": code, "message": message}}
+
+
+if __name__ == "__main__":
+    ComputeWorker().serve()